@@ -0,0 +1,168 @@
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+import time
+import math
+from typing import Tuple
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
+
+class AggregatedGurobiOptimization:
+    """Solves the model over student types instead of individual students.
+
+    Students whose (recharge rate, discharge rate, initial battery) fall in the same cell of a grid
+    with the given tolerances form one type. The integer model decides how many students of each
+    type charge and how many are in use per slot, with each type's total battery following the
+    mean rates of its members, so its size depends on the number of types K and not on N. The
+    per-type socket counts are then handed out to the individual students, simulated with their own
+    rates. The score of that schedule is reported, and aggregation_error is how far it falls below
+    the aggregated objective.
+
+    On small instances the handed-out schedule can score below the heuristic. With heuristic_floor,
+    the heuristic's schedule is returned instead in that case (kept_heuristic).
+    """
+
+    def __init__(self, tolerances: Tuple[float, float, float] = (10.0, 10.0, 30.0), threads: int = 0, heuristic_floor: bool = True):
+        self.name = "Aggregated Gurobi Optimization"
+        self.tolerances = tolerances  # Cell widths for recharge rate, discharge rate and initial battery
+        self.threads = threads
+        self.heuristic_floor = heuristic_floor  # Never return a schedule that scores below the heuristic's
+
+    def cluster_students(self, optimization_instance: OptimizationInstance):
+        """Return each student's type, the number of students per type and the per-type mean parameters."""
+        cells = np.floor(optimization_instance.student_data.T / np.asarray(self.tolerances))
+        _, types, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+        types = types.reshape(-1)
+        means = np.zeros((len(counts), 3))
+        np.add.at(means, types, optimization_instance.student_data.T)
+        return types, counts, means / counts[:, None]
+
+    def build_model(self, counts, r, d, total_battery, num_sockets, num_students, num_time_slots, delta_t, time_limit):
+        num_types = len(counts)
+        model = gp.Model("laptop_charging_aggregated")
+        if time_limit > 0:
+            model.setParam('TimeLimit', time_limit)
+        if self.threads > 0:
+            model.setParam('Threads', self.threads)
+        model.Params.OutputFlag = 0
+        model.Params.LogToConsole = 0
+
+        type_sizes = np.repeat(counts[:, None], num_time_slots, axis=1)
+        Y = model.addMVar((num_types, num_time_slots), lb=0, ub=type_sizes, vtype=GRB.INTEGER, name="Y")
+        U = model.addMVar((num_types, num_time_slots), lb=0, ub=type_sizes, vtype=GRB.INTEGER, name="U")
+        Z = model.addVar(vtype=GRB.INTEGER, name='min_usage_time')
+        E = model.addMVar((num_types, num_time_slots + 1), lb=0, ub=100 * np.repeat(counts[:, None], num_time_slots + 1, axis=1),
+                          vtype=GRB.CONTINUOUS, name="E")
+        A = model.addVar(vtype=GRB.CONTINUOUS, name='average_usage_time')
+
+        model.addConstr(E[:, 0] == total_battery, name="init_battery")
+        # Every type must reach Z slots of usage per student on average
+        model.addConstr(U.sum(axis=1) >= counts * Z, name="sum_of_usage")
+        model.addConstr(E[:, 1:] == E[:, :-1] + ((r + d) * delta_t)[:, None] * Y - (d * delta_t)[:, None] * U, name="battery_dynamics")
+        model.addConstr(Y.sum(axis=0) <= num_sockets, name="socket_avail")
+        model.addConstr(U.sum() / (num_students * num_time_slots) == A, name="average_usage")
+        model.addConstr(U >= Y, name="usage_when_charging")
+
+        model.setObjective(Z + A, GRB.MAXIMIZE)
+        return model, (Y, U, Z, E, A)
+
+    def disaggregate(self, optimization_instance: OptimizationInstance, types, charging_counts, num_time_slots):
+        """Hand each type's sockets to its students, simulated with their own rates.
+
+        Within a type, students that would run flat come first, then the least used, then the lowest
+        battery. Sockets a type can't use go to the lowest forecasts overall, and like the heuristic
+        every student with enough battery keeps working.
+        """
+        num_students = optimization_instance.num_students
+        num_sockets = optimization_instance.num_sockets
+        delta_t = optimization_instance.delta_t
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+
+        B_matrix = np.zeros((num_students, num_time_slots + 1))
+        B_matrix[:, 0] = optimization_instance.initial_batteries
+        Y_matrix = np.zeros((num_students, num_time_slots))
+        U_matrix = np.zeros((num_students, num_time_slots))
+        usage = np.zeros(num_students)
+        members = [np.flatnonzero(types == k) for k in range(len(charging_counts))]
+
+        for t in range(num_time_slots):
+            battery = B_matrix[:, t]
+            forecasted_battery_levels = battery - d * delta_t
+            fits = battery + r * delta_t <= 100
+
+            for k, students in enumerate(members):
+                candidates = students[fits[students]]
+                order = np.lexsort((forecasted_battery_levels[candidates], usage[candidates], forecasted_battery_levels[candidates] >= 0))
+                Y_matrix[candidates[order[:int(charging_counts[k, t])]], t] = 1
+
+            remaining_sockets = int(num_sockets - np.sum(Y_matrix[:, t]))
+            if remaining_sockets > 0:
+                candidates = np.flatnonzero((Y_matrix[:, t] == 0) & fits)
+                Y_matrix[candidates[np.argsort(forecasted_battery_levels[candidates], kind='stable')[:remaining_sockets]], t] = 1
+
+            U_matrix[:, t] = (forecasted_battery_levels >= 0) | (Y_matrix[:, t] == 1)
+            usage += U_matrix[:, t]
+            B_matrix[:, t + 1] = battery + Y_matrix[:, t] * (r + d) * delta_t - U_matrix[:, t] * d * delta_t
+
+        return Y_matrix, U_matrix, B_matrix
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> OptimizationResult:
+        num_students = optimization_instance.num_students
+        delta_t = optimization_instance.delta_t
+        num_time_slots = math.ceil(optimization_instance.total_time / delta_t)
+
+        model_build_start_time = time.time()
+        types, counts, means = self.cluster_students(optimization_instance)
+        total_battery = np.bincount(types, weights=optimization_instance.initial_batteries, minlength=len(counts))
+        model, (Y, U, Z, E, A) = self.build_model(counts, means[:, 0], means[:, 1], total_battery, optimization_instance.num_sockets,
+                                                  num_students, num_time_slots, delta_t, optimization_instance.time_limit)
+        model_build_end_time = time.time()
+
+        optimization_start_time = time.time()
+        model.optimize()
+
+        if not ((model.status == GRB.TIME_LIMIT or model.status == GRB.OPTIMAL) and model.SolCount > 0):
+            optimization_end_time = time.time()
+            return OptimizationResult(status='not_optimal', model_build_time=model_build_end_time - model_build_start_time,
+                                      optimization_time=optimization_end_time - optimization_start_time, num_types=len(counts))
+
+        aggregated_score = model.ObjVal
+        Y_matrix, U_matrix, B_matrix = self.disaggregate(optimization_instance, types, np.round(Y.X), num_time_slots)
+        disaggregated_score = np.min(np.sum(U_matrix, axis=1)) + np.sum(U_matrix) / (num_time_slots * num_students)
+
+        kept_heuristic = False
+        if self.heuristic_floor:
+            heuristic_result = VectorizedHeuristicOptimization().optimize_allocation(optimization_instance)
+            if heuristic_result.fair_maximized_usage_score > disaggregated_score:
+                kept_heuristic = True
+                Y_matrix = heuristic_result.Y.astype(float)
+                U_matrix = heuristic_result.U.astype(float)
+                r = optimization_instance.recharge_rates
+                d = optimization_instance.discharge_rates
+                B_matrix[:, 1:] = B_matrix[:, :1] + np.cumsum(Y_matrix * ((r + d) * delta_t)[:, None] - U_matrix * (d * delta_t)[:, None], axis=1)
+        optimization_end_time = time.time()
+
+        A = (np.sum(U_matrix) / (num_time_slots * num_students))
+        Z = np.min(np.sum(U_matrix, axis=1))
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=( A+ Z),
+            min_usage_time=Z,
+            A=A,
+            U=U_matrix,
+            Y=Y_matrix,
+            B=B_matrix,
+            model_build_time=model_build_end_time - model_build_start_time,
+            optimization_time=optimization_end_time - optimization_start_time,
+            num_types=len(counts),
+            aggregated_score=aggregated_score,
+            aggregation_error=aggregated_score - disaggregated_score,
+            kept_heuristic=kept_heuristic
+        )
+        if model.status == GRB.TIME_LIMIT:
+            result['stopped_early'] = 'time_limit'
+        model.dispose()
+
+        return result
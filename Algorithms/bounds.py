@@ -0,0 +1,83 @@
+import math
+import numpy as np
+from typing import List
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+
+# A student in use for u slots gains (r + d) * delta_t per charging slot and loses d * delta_t per
+# used slot, so ending with a non-negative battery needs at least (d * u * delta_t - b0) / ((r + d) * delta_t)
+# charging slots, and the sockets offer num_sockets * num_time_slots of them. The bounds below relax
+# the per-slot socket limit and the 100% battery cap to that single budget, so they are valid for every schedule.
+
+def charging_slots_needed(optimization_instance: OptimizationInstance, usage_slots) -> np.ndarray:
+    """Fewest charging slots each student needs to be in use for usage_slots slots (broadcasts over usage_slots)."""
+    delta_t = optimization_instance.delta_t
+    r = optimization_instance.recharge_rates
+    d = optimization_instance.discharge_rates
+    b0 = optimization_instance.initial_batteries
+    # The small tolerance keeps floating point noise from rounding the count past the true minimum
+    needed = np.ceil((d * np.asarray(usage_slots)[..., None] * delta_t - b0) / ((r + d) * delta_t) - 1e-9)
+    return needed.clip(min=0)
+
+def min_usage_upper_bound(optimization_instance: OptimizationInstance) -> int:
+    """Largest Z every student can reach when all charging slots are pooled."""
+    num_time_slots = math.ceil(optimization_instance.total_time / optimization_instance.delta_t)
+    budget = optimization_instance.num_sockets * num_time_slots
+    total_needed = charging_slots_needed(optimization_instance, np.arange(num_time_slots + 1)).sum(axis=1)
+    return int(np.flatnonzero(total_needed <= budget).max(initial=0))
+
+def average_usage_upper_bound(optimization_instance: OptimizationInstance) -> float:
+    """LP bound on A: battery-free usage first, then the cheapest usage per charging slot until the sockets run out."""
+    num_students = optimization_instance.num_students
+    delta_t = optimization_instance.delta_t
+    num_time_slots = math.ceil(optimization_instance.total_time / delta_t)
+    r = optimization_instance.recharge_rates
+    d = optimization_instance.discharge_rates
+    b0 = optimization_instance.initial_batteries
+
+    free_slots = np.minimum(b0 / (d * delta_t), num_time_slots)
+    cost = d / (r + d)  # Charging slots per additional usage slot
+    order = np.argsort(cost)
+    extra_slots = (num_time_slots - free_slots)[order]
+    extra_cost = (cost * (num_time_slots - free_slots))[order]
+
+    budget = optimization_instance.num_sockets * num_time_slots
+    affordable = np.cumsum(extra_cost) <= budget
+    bought = np.sum(extra_slots[affordable])
+    spent = np.sum(extra_cost[affordable])
+    if not affordable.all():
+        # The first student that doesn't fit fully gets what is left of the budget
+        first_partial = np.argmin(affordable)
+        bought += (budget - spent) / cost[order][first_partial]
+
+    return min(1.0, (np.sum(free_slots) + bought) / (num_students * num_time_slots))
+
+def score_upper_bound(optimization_instance: OptimizationInstance) -> float:
+    return min_usage_upper_bound(optimization_instance) + average_usage_upper_bound(optimization_instance)
+
+def meets_upper_bound(result: OptimizationResult, optimization_instance: OptimizationInstance, tolerance: float = 1e-6) -> bool:
+    """True if the result is proven optimal because its score reaches score_upper_bound."""
+    return (result.get('status') == 'optimal' and result.get('fair_maximized_usage_score') is not None
+            and result['fair_maximized_usage_score'] >= score_upper_bound(optimization_instance) - tolerance)
+
+def socket_lower_bound(optimization_instances: List[OptimizationInstance]) -> int:
+    """Smallest s for which every instance can keep all students working for the whole horizon."""
+    lower_bound = 1
+    for optimization_instance in optimization_instances:
+        num_time_slots = math.ceil(optimization_instance.total_time / optimization_instance.delta_t)
+        charging_slots = charging_slots_needed(optimization_instance, num_time_slots)
+        lower_bound = max(lower_bound, math.ceil(np.sum(charging_slots) / num_time_slots - 1e-9))
+    return lower_bound
+
+def stop_at_bound_callback(bound: float, tolerance: float = 1e-6):
+    """Gurobi callback that terminates the solve as soon as an incumbent reaches bound.
+
+    It sets model._stopped_at_bound, which tells this stop apart from other interruptions. Reset it
+    to False before each optimize().
+    """
+    from gurobipy import GRB  # Imported here so the bounds stay usable without Gurobi
+    def callback(model, where):
+        if where == GRB.Callback.MIPSOL and model.cbGet(GRB.Callback.MIPSOL_OBJ) >= bound - tolerance:
+            model._stopped_at_bound = True
+            model.terminate()
+    return callback
@@ -1,37 +1,32 @@
 import gurobipy as gp
 from gurobipy import GRB
-from typing import List, Dict, Optional
+from typing import Callable, Dict, Optional
 from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Algorithms.bounds import score_upper_bound, stop_at_bound_callback
+from Algorithms.solver_telemetry import SolverTraceRecorder, chain_callbacks
+from Algorithms.instrumentation import Instrumentation
 import numpy as np
+import scipy.sparse as sp
 import time
 import math
 
 class GurobiOptimization:
-    def __init__(self):
+    def __init__(self, threads: int = 0, matrix_api: bool = True, stop_at_bound: bool = True, record_trace: bool = False,
+                 trace_interval: float = 1.0, instrumentation: Optional[Instrumentation] = None,
+                 on_incumbent: Optional[Callable[[OptimizationResult], None]] = None, should_stop: Optional[Callable[[], bool]] = None):
         self.name = "Gurobi Optimization"
-
-    def optimize_allocation(self, optimization_instance: OptimizationInstance, initial_guesses: Optional[Dict[str, np.ndarray]] = None) -> Dict:
-        students = optimization_instance.students
-        num_students = len(students)
-        total_available_time = optimization_instance.total_time
-        delta_t = optimization_instance.delta_t
-
-        r = np.array([s.recharge_rate for s in students])
-        d = np.array([s.discharge_rate for s in students])
-        b0 = np.array([s.initial_battery for s in students])
-
-        num_time_slots = math.ceil(total_available_time / delta_t)
-
-        model_build_start_time = time.time()
-        model = gp.Model("laptop_charging")
-        # Set the acceptable optimality gap (e.g., 0.0001 for 99.99% optimality)
-        # model.setParam('MIPGap', 0.001)
-
-        if optimization_instance.time_limit > 0:
-            model.setParam('TimeLimit', optimization_instance.time_limit)
-
-        model.Params.OutputFlag = 0
-        model.Params.LogToConsole = 0
+        self.exact = True
+        self.stop_at_bound = stop_at_bound  # Stop as soon as the incumbent reaches the bounds.score_upper_bound, it is then optimal
+        self.record_trace = record_trace  # Attach an incumbent/bound/gap time series to the result as 'solver_trace'
+        self.trace_interval = trace_interval  # Seconds between trace points while no new incumbent is found
+        self.instrumentation = instrumentation or Instrumentation()  # Per-phase timing hooks, a no-op by default
+        self.on_incumbent = on_incumbent  # Called during the solve with the result of every new incumbent
+        self.should_stop = should_stop  # Polled during the solve, which is terminated once it returns True
+        self.threads = threads  # 0 lets Gurobi use every core
+        self.matrix_api = matrix_api  # Build whole-array constraints with addMVar and sparse matrices instead of one addConstr per row
+
+    def add_formulation(self, model, r, d, b0, num_sockets, num_students, num_time_slots, delta_t, initial_guesses, prior_usage=None):
         Y = model.addVars(num_students, num_time_slots, vtype=GRB.BINARY, name="Y")
         U = model.addVars(num_students, num_time_slots, vtype=GRB.BINARY, name="U")
         Z = model.addVar(vtype=GRB.INTEGER, name='min_usage_time')
@@ -39,26 +34,25 @@ class GurobiOptimization:
         A = model.addVar(vtype=GRB.CONTINUOUS, name='average_usage_time')
 
         if initial_guesses:
-            for i in range(num_students):
-                for t in range(num_time_slots):
-                    Y[i, t].start = initial_guesses['Y'][i, t]
-                    U[i, t].start = initial_guesses['U'][i, t]
-                for t in range(num_time_slots + 1):
-                    if t < initial_guesses['B'].shape[1]:
-                        B[i, t].start = initial_guesses['B'][i, t]
+            # The tupledicts list their variables row-major, like the flattened guesses
+            model.setAttr('Start', list(Y.values()), np.ravel(initial_guesses['Y']))
+            model.setAttr('Start', list(U.values()), np.ravel(initial_guesses['U']))
+            model.setAttr('Start', list(B.values()), np.ravel(initial_guesses['B']))
 
         for i in range(num_students):
             model.addConstr(B[i, 0] == b0[i], name=f"init_battery_{i}")
 
         for i in range(num_students):
-            model.addConstr(gp.quicksum(U[i, t] for t in range(num_time_slots)) >= Z, name=f"sum_of_usage_{i}")
+            usage_before = 0 if prior_usage is None else prior_usage[i]
+            model.addConstr(usage_before + gp.quicksum(U[i, t] for t in range(num_time_slots)) >= Z, name=f"sum_of_usage_{i}")
 
         for t in range(num_time_slots):
             for i in range(num_students):
                 model.addConstr(B[i, t + 1] == B[i, t] + Y[i, t] * r[i] * delta_t + Y[i, t] * d[i] * delta_t - U[i, t] * d[i] * delta_t, name=f"battery_dynamics_{i}_{t}")
 
+        socket_avail = []
         for t in range(num_time_slots):
-            model.addConstr(gp.quicksum(Y[i, t] for i in range(num_students)) <= optimization_instance.num_sockets, name=f"socket_avail_{t}")
+            socket_avail.append(model.addConstr(gp.quicksum(Y[i, t] for i in range(num_students)) <= num_sockets, name=f"socket_avail_{t}"))
 
         model.addConstr(gp.quicksum((U[i, t] / (num_students * num_time_slots)) for t in range(num_time_slots) for i in range(num_students)) == A, name=f"average_usage")
 
@@ -66,38 +60,183 @@ class GurobiOptimization:
             for i in range(num_students):
                 model.addConstr(U[i, t] >= Y[i, t])
 
-        model.setObjective(Z+A , GRB.MAXIMIZE)
-        model_build_end_time = time.time()
+        return Y, U, Z, B, A, socket_avail
 
-        optimization_start_time = time.time()
-        model.optimize()
-        optimization_end_time = time.time()
+    def add_matrix_formulation(self, model, r, d, b0, num_sockets, num_students, num_time_slots, delta_t, initial_guesses, prior_usage=None):
+        """Same formulation as add_formulation, with each constraint family added as one matrix constraint.
 
-        if model.status == GRB.TIME_LIMIT or model.status == GRB.OPTIMAL:
-            U_matrix = [[round(U[i, t].X) for t in range(num_time_slots)] for i in range(num_students)]
-            Y_matrix = [[round(Y[i, t].X) for t in range(num_time_slots)] for i in range(num_students)]
-            B_matrix = [[round(B[i, t].X) for t in range(num_time_slots + 1)] for i in range(num_students)]
-
-            result = {
-                'fair_maximized_usage_score': Z.X + A.X,
-                'min_usage_time': Z.X,
-                'A': A.X,
-                'U': U_matrix,
-                'Y': Y_matrix,
-                'B': B_matrix,
-                'model_build_time': model_build_end_time - model_build_start_time,
-                'optimization_time': optimization_end_time - optimization_start_time,
-                'status': 'optimal'
-            }
+        The row-by-row families are built from scipy.sparse coefficient matrices. Y, U and B are
+        MVars of shape (N, T), (N, T) and (N, T + 1), so Y[i, t] still addresses student i in slot t.
+        prior_usage adds slots each student already used before this horizon to the fairness term Z.
+        """
+        Y = model.addMVar((num_students, num_time_slots), vtype=GRB.BINARY, name="Y")
+        U = model.addMVar((num_students, num_time_slots), vtype=GRB.BINARY, name="U")
+        Z = model.addVar(vtype=GRB.INTEGER, name='min_usage_time')
+        B = model.addMVar((num_students, num_time_slots + 1), lb=0, ub=100, vtype=GRB.CONTINUOUS, name="B")
+        A = model.addVar(vtype=GRB.CONTINUOUS, name='average_usage_time')
+
+        if initial_guesses:
+            Y.Start = initial_guesses['Y']
+            U.Start = initial_guesses['U']
+            B.Start = initial_guesses['B']
+
+        # Flattened row-major views: student i in slot t is entry i * T + t of y and u, and i * (T + 1) + t of b
+        y = Y.reshape(-1)
+        u = U.reshape(-1)
+        b = B.reshape(-1)
+        num_cells = num_students * num_time_slots
+        cells = np.arange(num_cells)
+        battery_columns = np.repeat(np.arange(num_students), num_time_slots) * (num_time_slots + 1) + np.tile(np.arange(num_time_slots), num_students)
+
+        initial_battery = sp.csr_matrix((np.ones(num_students), (np.arange(num_students), np.arange(num_students) * (num_time_slots + 1))), shape=(num_students, b.size))
+        current_battery = sp.csr_matrix((np.ones(num_cells), (cells, battery_columns)), shape=(num_cells, b.size))
+        next_battery = sp.csr_matrix((np.ones(num_cells), (cells, battery_columns + 1)), shape=(num_cells, b.size))
+        charge_gain = sp.diags(np.repeat((r + d) * delta_t, num_time_slots))
+        discharge_loss = sp.diags(np.repeat(d * delta_t, num_time_slots))
+
+        model.addConstr(initial_battery @ b == b0, name="init_battery")
+        if prior_usage is None:
+            model.addConstr(U.sum(axis=1) >= Z, name="sum_of_usage")
+        else:
+            model.addConstr(U.sum(axis=1) + prior_usage >= Z, name="sum_of_usage")
+        model.addConstr((next_battery - current_battery) @ b - charge_gain @ y + discharge_loss @ u == 0, name="battery_dynamics")
+        socket_avail = model.addConstr(Y.sum(axis=0) <= num_sockets, name="socket_avail")
+        model.addConstr(U.sum() / (num_students * num_time_slots) == A, name="average_usage")
+        model.addConstr(U >= Y, name="usage_when_charging")
+
+        return Y, U, Z, B, A, socket_avail
+
+    def build_model(self, optimization_instance: OptimizationInstance, initial_guesses: Optional[Dict[str, np.ndarray]] = None,
+                    prior_usage: Optional[np.ndarray] = None, terminal_battery_weight: float = 0):
+        """Build the model. initial_guesses holds MIP start values for Y and U, shape (N, T), and B, shape (N, T + 1)."""
+        num_students = optimization_instance.num_students
+        total_available_time = optimization_instance.total_time
+        delta_t = optimization_instance.delta_t
+
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+        b0 = optimization_instance.initial_batteries
+
+        num_time_slots = math.ceil(total_available_time / delta_t)
+
+        model = gp.Model("laptop_charging")
+        # Set the acceptable optimality gap (e.g., 0.0001 for 99.99% optimality)
+        # model.setParam('MIPGap', 0.001)
+
+        if optimization_instance.time_limit > 0:
+            model.setParam('TimeLimit', optimization_instance.time_limit)
+
+        if self.threads > 0:
+            model.setParam('Threads', self.threads)
+
+        model.Params.OutputFlag = 0
+        model.Params.LogToConsole = 0
+
+        if self.matrix_api:
+            variables = self.add_matrix_formulation(model, r, d, b0, optimization_instance.num_sockets, num_students, num_time_slots, delta_t, initial_guesses, prior_usage)
+        else:
+            variables = self.add_formulation(model, r, d, b0, optimization_instance.num_sockets, num_students, num_time_slots, delta_t, initial_guesses, prior_usage)
+
+        Z, B, A = variables[2], variables[3], variables[4]
+        if terminal_battery_weight > 0:
+            # Rewards battery left at the end of the horizon, e.g. for a rolling-horizon window
+            end_battery = B[:, num_time_slots].sum() if self.matrix_api else gp.quicksum(B[i, num_time_slots] for i in range(num_students))
+            model.setObjective(Z + A + terminal_battery_weight * end_battery, GRB.MAXIMIZE)
+        else:
+            model.setObjective(Z+A , GRB.MAXIMIZE)
+        return model, variables
+
+    def extract_result(self, optimization_instance: OptimizationInstance, model, variables, model_build_time: float, optimization_time: float) -> OptimizationResult:
+        if (model.status == GRB.TIME_LIMIT or model.status == GRB.OPTIMAL or model.status == GRB.INTERRUPTED) and model.SolCount > 0:
+            # Every variable value in one call
+            result = self.solution_result(optimization_instance, np.array(model.X), model_build_time, optimization_time)
+            # INTERRUPTED is only optimal when the stop_at_bound callback stopped the solve. Any other
+            # interruption (Ctrl-C, a terminate from outside) leaves an arbitrary incumbent, like a time limit
+            if model.status == GRB.TIME_LIMIT:
+                result['stopped_early'] = 'time_limit'
+            elif model.status == GRB.INTERRUPTED and not getattr(model, '_stopped_at_bound', False):
+                result['stopped_early'] = 'interrupted'
             return result
         else:
-            result = {
-                'fair_maximized_usage_score': None,
-                'U': None,
-                'Y': None,
-                'B': None,
-                'model_build_time': model_build_end_time - model_build_start_time,
-                'optimization_time': optimization_end_time - optimization_start_time,
-                'status': 'not_optimal'
-            }
+            result = OptimizationResult(
+                status='not_optimal',
+                model_build_time=model_build_time,
+                optimization_time=optimization_time
+            )
             return result
+
+    def solution_result(self, optimization_instance: OptimizationInstance, values: np.ndarray, model_build_time: float, optimization_time: float) -> OptimizationResult:
+        """The result for the variable values of a solution, laid out in build order: Y, U, Z, B, A."""
+        num_students = optimization_instance.num_students
+        num_time_slots = math.ceil(optimization_instance.total_time / optimization_instance.delta_t)
+        num_cells = num_students * num_time_slots
+
+        Y_matrix = np.round(values[:num_cells]).reshape(num_students, num_time_slots)
+        U_matrix = np.round(values[num_cells:2 * num_cells]).reshape(num_students, num_time_slots)
+        Z = values[2 * num_cells]
+        B_matrix = values[2 * num_cells + 1:-1].reshape(num_students, num_time_slots + 1)
+        A = values[-1]
+
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=Z + A,
+            min_usage_time=Z,
+            A=A,
+            U=U_matrix,
+            Y=Y_matrix,
+            B=B_matrix,
+            model_build_time=model_build_time,
+            optimization_time=optimization_time
+        )
+        return result
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance, initial_guesses: Optional[Dict[str, np.ndarray]] = None,
+                            prior_usage: Optional[np.ndarray] = None, terminal_battery_weight: float = 0) -> OptimizationResult:
+        instrumentation = self.instrumentation
+        instrumentation.start()
+
+        model_build_start_time = time.time()
+        with instrumentation.phase('build'):
+            model, variables = self.build_model(optimization_instance, initial_guesses, prior_usage, terminal_battery_weight)
+        model_build_end_time = time.time()
+
+        # The bound only holds for the plain objective, without prior usage or a terminal reward
+        plain_objective = prior_usage is None and terminal_battery_weight == 0
+        callback, recorder = self.create_callback(optimization_instance, plain_objective, model_build_end_time - model_build_start_time)
+
+        optimization_start_time = time.time()
+        model._stopped_at_bound = False
+        with instrumentation.phase('solve'):
+            model.optimize(callback)
+        optimization_end_time = time.time()
+
+        with instrumentation.phase('extract'):
+            result = self.extract_result(optimization_instance, model, variables, model_build_end_time - model_build_start_time, optimization_end_time - optimization_start_time)
+        if recorder is not None:
+            result['solver_trace'] = recorder.finish(model)
+        if instrumentation.enabled:
+            for name in ('U', 'Y', 'B'):
+                if result.get(name) is not None:
+                    instrumentation.record_allocation(name, result[name].nbytes)
+            result['profile'] = instrumentation.report()
+        return result
+
+    def create_callback(self, optimization_instance: OptimizationInstance, plain_objective: bool = True, model_build_time: float = 0):
+        """Return the optimize() callback for this solver's settings and the trace recorder, if any."""
+        recorder = SolverTraceRecorder(self.trace_interval) if self.record_trace else None
+        incumbent_callback = None
+        if self.on_incumbent is not None:
+            def incumbent_callback(model, where):
+                if where == GRB.Callback.MIPSOL:
+                    values = np.array(model.cbGetSolution(model.getVars()))
+                    self.on_incumbent(self.solution_result(optimization_instance, values, model_build_time, model.cbGet(GRB.Callback.RUNTIME)))
+        stop_callback = None
+        if self.stop_at_bound and plain_objective:
+            stop_callback = stop_at_bound_callback(score_upper_bound(optimization_instance))
+        terminate_callback = None
+        if self.should_stop is not None:
+            def terminate_callback(model, where):
+                if self.should_stop():
+                    model.terminate()
+        # The recorder and incumbents go first so the incumbent that triggers the stop is still recorded
+        return chain_callbacks(recorder, incumbent_callback, stop_callback, terminate_callback), recorder
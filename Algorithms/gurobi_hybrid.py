@@ -1,27 +1,205 @@
+import math
+import time
+import gurobipy as gp
+from gurobipy import GRB
 import numpy as np
-from typing import Dict
+from typing import Dict, Optional
 from Entities.optimization_instance import OptimizationInstance
-from Algorithms.heuristic_algorithm import HeuristicOptimization
+from Entities.optimization_result import OptimizationResult
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
 from Algorithms.gurobi_algorithm import GurobiOptimization
+from Algorithms.bounds import score_upper_bound
 
 class GurobiHybridOptimization:
-    def __init__(self):
-        self.name = "Gurobi Hybrid Optimization"
-
-    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> Dict:
-        # Step 1: Run the heuristic algorithm
-        heuristic_optimizer = HeuristicOptimization()
-        heuristic_result = heuristic_optimizer.optimize_allocation(optimization_instance)
-
-        # Step 2: Extract initial guesses from the heuristic results
-        initial_guesses = {
-            'U': np.array(heuristic_result['U']),
-            'Y': np.array(heuristic_result['Y']),
-            'B': np.array(heuristic_result['B'])
-        }
-
-        # Step 3: Run the Gurobi algorithm with initial guesses
-        gurobi_optimizer = GurobiOptimization()
-        gurobi_result = gurobi_optimizer.optimize_allocation(optimization_instance, initial_guesses)
-
-        return gurobi_result
+    """Gurobi started from the heuristic's schedule, or with fix_and_optimize, a matheuristic around it.
+
+    Fix-and-optimize keeps the heuristic's schedule and repeatedly re-solves a small neighbourhood of
+    it exactly: neighbourhood_students students, over a window of neighbourhood_slots slots (all slots
+    if None). Everything else stays fixed and enters the reduced model as constants: the sockets
+    the other students take, their usage towards Z and A, and the battery range the neighbourhood must
+    end the window in so its fixed schedule after the window stays feasible. The reduced model is
+    started from the current schedule, so the score never drops. It stops when time_budget (the
+    instance time limit by default) runs out, the score reaches the bounds.score_upper_bound, or
+    max_stalled neighbourhoods in a row gave no improvement.
+
+    initial_solver gives the starting schedule, the vectorized heuristic by default. Starting from
+    LocalSearchOptimization works well, the neighbourhoods then find moves the local search can't.
+    """
+
+    def __init__(self, fix_and_optimize: bool = False, neighbourhood_students: int = 20, neighbourhood_slots: Optional[int] = 4,
+                 time_budget: Optional[float] = None, subproblem_time_limit: float = 1, max_stalled: int = 50, seed: int = 0,
+                 initial_solver=None):
+        self.name = "Gurobi Fix-and-Optimize" if fix_and_optimize else "Gurobi Hybrid Optimization"
+        self.exact = not fix_and_optimize
+        self.fix_and_optimize = fix_and_optimize
+        self.neighbourhood_students = neighbourhood_students
+        self.neighbourhood_slots = neighbourhood_slots
+        self.time_budget = time_budget  # Seconds, including the heuristic
+        self.subproblem_time_limit = subproblem_time_limit  # Seconds per neighbourhood
+        self.max_stalled = max_stalled
+        self.seed = seed
+        self.initial_solver = initial_solver or VectorizedHeuristicOptimization()
+
+    def initial_guesses(self, optimization_instance: OptimizationInstance, heuristic_result: OptimizationResult) -> Dict[str, np.ndarray]:
+        """The heuristic's schedule, with the final battery level it leaves out of B added back."""
+        delta_t = optimization_instance.delta_t
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+        Y = heuristic_result['Y'].astype(float)
+        U = heuristic_result['U'].astype(float)
+        B = heuristic_result['B']
+        final_battery = B[:, -1] + Y[:, -1] * (r + d) * delta_t - U[:, -1] * d * delta_t
+        return {'U': U, 'Y': Y, 'B': np.column_stack((B, final_battery))}
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> OptimizationResult:
+        start_time = time.time()
+        heuristic_result = self.initial_solver.optimize_allocation(optimization_instance)
+        initial_guesses = self.initial_guesses(optimization_instance, heuristic_result)
+
+        if not self.fix_and_optimize:
+            return GurobiOptimization().optimize_allocation(optimization_instance, initial_guesses)
+        return self.improve(optimization_instance, initial_guesses, start_time)
+
+    def improve(self, optimization_instance: OptimizationInstance, initial_guesses: Dict[str, np.ndarray], start_time: float) -> OptimizationResult:
+        num_students = optimization_instance.num_students
+        num_time_slots = math.ceil(optimization_instance.total_time / optimization_instance.delta_t)
+        time_budget = self.time_budget if self.time_budget is not None else optimization_instance.time_limit
+        deadline = start_time + time_budget if time_budget and time_budget > 0 else math.inf
+        upper_bound = score_upper_bound(optimization_instance)
+        rng = np.random.default_rng(self.seed)
+
+        Y = initial_guesses['Y'].copy()
+        U = initial_guesses['U'].copy()
+        B = initial_guesses['B'].copy()
+        initial_score = self.score(U)
+        score = initial_score
+        model_build_time = 0
+        num_iterations = 0
+        num_improvements = 0
+        stalled = 0
+        stopped_early = None
+
+        while stalled < self.max_stalled and score < upper_bound - 1e-6:
+            time_left = deadline - time.time()
+            if time_left <= 0:
+                stopped_early = 'time_limit'
+                break
+            students, start, stop = self.choose_neighbourhood(rng, Y, U, B)
+            build_start_time = time.time()
+            model, variables = self.build_neighbourhood(optimization_instance, students, start, stop, Y, U, B)
+            model_build_time += time.time() - build_start_time
+            model.Params.TimeLimit = min(self.subproblem_time_limit, time_left)
+            model.optimize()
+            num_iterations += 1
+
+            if model.SolCount > 0 and model.ObjVal / (num_students * num_time_slots) > score + 1e-9:
+                y, u = variables
+                Y[students, start:stop] = np.round(y.X)
+                U[students, start:stop] = np.round(u.X)
+                B[students] = self.simulate(optimization_instance, students, Y, U)
+                score = self.score(U)
+                num_improvements += 1
+                stalled = 0
+            else:
+                stalled += 1
+            model.dispose()
+
+        usage = U.sum(axis=1)
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=score,
+            min_usage_time=usage.min(),
+            A=U.sum() / (num_students * num_time_slots),
+            U=U,
+            Y=Y,
+            B=B,
+            model_build_time=model_build_time,
+            optimization_time=time.time() - start_time - model_build_time,
+            initial_score=initial_score,
+            num_iterations=num_iterations,
+            num_improvements=num_improvements
+        )
+        if stopped_early:
+            result['stopped_early'] = stopped_early
+        return result
+
+    def choose_neighbourhood(self, rng, Y, U, B):
+        """Students idle in the window, least used first, and students charging in it who could give up a socket to them."""
+        num_students, num_time_slots = U.shape
+        size = min(self.neighbourhood_students, num_students)
+        window = min(self.neighbourhood_slots or num_time_slots, num_time_slots)
+        start = int(rng.integers(0, num_time_slots - window + 1))
+        stop = start + window
+
+        usage = U.sum(axis=1)
+        idle = np.flatnonzero((U[:, start:stop] == 0).any(axis=1))
+        if len(idle) == 0:
+            idle = np.arange(num_students)
+        # Random order among students with the same usage
+        idle = idle[np.lexsort((rng.random(len(idle)), usage[idle]))]
+        students = idle[:max(1, size // 2)]
+
+        others = np.ones(num_students, dtype=bool)
+        others[students] = False
+        # Weighted by the charging slots they have in the window and the battery they can spare after it
+        weights = Y[:, start:stop].sum(axis=1) * (B[:, start + 1:].min(axis=1) + 1) * others
+        if weights.sum() == 0:
+            weights = others.astype(float)
+        num_others = min(size - len(students), int(np.count_nonzero(weights)))
+        if num_others > 0:
+            students = np.concatenate((students, rng.choice(num_students, num_others, replace=False, p=weights / weights.sum())))
+        return np.sort(students), start, stop
+
+    def build_neighbourhood(self, optimization_instance: OptimizationInstance, students, start, stop, Y, U, B):
+        num_students, num_time_slots = U.shape
+        delta_t = optimization_instance.delta_t
+        gain = ((optimization_instance.recharge_rates + optimization_instance.discharge_rates) * delta_t)[students]
+        loss = (optimization_instance.discharge_rates * delta_t)[students]
+        fixed = np.ones(num_students, dtype=bool)
+        fixed[students] = False
+
+        sockets_left = optimization_instance.num_sockets - Y[fixed, start:stop].sum(axis=0)
+        usage_outside = U[students].sum(axis=1) - U[students, start:stop].sum(axis=1)
+        fixed_usage = U.sum() - U[students, start:stop].sum()
+        # The schedule after the window is kept, so it shifts the battery at the end of the window by a fixed profile
+        after_window = B[students, stop:] - B[students, stop:stop + 1]
+
+        model = gp.Model("laptop_charging_neighbourhood")
+        model.Params.OutputFlag = 0
+        model.Params.LogToConsole = 0
+        # One slot of usage is worth 1 / (N * T) of the score, far below the default relative gap once N
+        # is large, so the objective is the score times N * T, which is integral
+        model.Params.MIPGap = 0
+        model.Params.MIPGapAbs = 0.5
+        num_window_slots = stop - start
+        y = model.addMVar((len(students), num_window_slots), vtype=GRB.BINARY, name="Y")
+        u = model.addMVar((len(students), num_window_slots), vtype=GRB.BINARY, name="U")
+        b = model.addMVar((len(students), num_window_slots + 1), lb=0, ub=100, vtype=GRB.CONTINUOUS, name="B")
+        Z = model.addVar(ub=U[fixed].sum(axis=1).min() if fixed.any() else GRB.INFINITY, vtype=GRB.INTEGER, name='min_usage_time')
+
+        y.Start = Y[students, start:stop]
+        u.Start = U[students, start:stop]
+        b.Start = B[students, start:stop + 1]
+
+        model.addConstr(b[:, 0] == B[students, start], name="window_start_battery")
+        model.addConstr(b[:, num_window_slots] >= -after_window.min(axis=1), name="window_end_battery_low")
+        model.addConstr(b[:, num_window_slots] <= 100 - after_window.max(axis=1), name="window_end_battery_high")
+        model.addConstr(b[:, 1:] == b[:, :-1] + gain[:, None] * y - loss[:, None] * u, name="battery_dynamics")
+        model.addConstr(y.sum(axis=0) <= sockets_left, name="socket_avail")
+        model.addConstr(u.sum(axis=1) + usage_outside >= Z, name="sum_of_usage")
+        model.addConstr(u >= y, name="usage_when_charging")
+        model.setObjective(num_students * num_time_slots * Z + u.sum() + fixed_usage, GRB.MAXIMIZE)
+        return model, (y, u)
+
+    @staticmethod
+    def simulate(optimization_instance: OptimizationInstance, students, Y, U) -> np.ndarray:
+        delta_t = optimization_instance.delta_t
+        r = optimization_instance.recharge_rates[students]
+        d = optimization_instance.discharge_rates[students]
+        b0 = optimization_instance.initial_batteries[students]
+        changes = Y[students] * ((r + d) * delta_t)[:, None] - U[students] * (d * delta_t)[:, None]
+        return np.column_stack((b0, b0[:, None] + np.cumsum(changes, axis=1)))
+
+    @staticmethod
+    def score(U) -> float:
+        return U.sum(axis=1).min() + U.sum() / U.size
@@ -0,0 +1,59 @@
+import time
+from gurobipy import GRB
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Algorithms.gurobi_algorithm import GurobiOptimization
+
+class GurobiSocketSweepSession:
+    """Keeps one Gurobi model per instance and re-solves it for different socket counts.
+
+    Only the right-hand side of the socket_avail constraints changes between solves. When the
+    socket count grows the previous solution stays feasible, so it is loaded as the MIP start.
+    """
+
+    def __init__(self, optimization_instance: OptimizationInstance, threads: int = 0, record_trace: bool = False) -> None:
+        self.name = "Gurobi Socket Sweep Session"
+        self.optimization_instance = optimization_instance
+        self.gurobi = GurobiOptimization(threads, matrix_api=True, record_trace=record_trace)
+
+        model_build_start_time = time.time()
+        self.model, self.variables = self.gurobi.build_model(optimization_instance)
+        self.pending_build_time = time.time() - model_build_start_time
+
+        self.previous_solution = None
+        self.previous_num_sockets = None
+
+    def solve(self, num_sockets: int) -> OptimizationResult:
+        """Re-optimize the instance with num_sockets sockets and return the usual result."""
+        model_update_start_time = time.time()
+        Y, U, Z, B, A, socket_avail = self.variables
+
+        socket_avail.RHS = num_sockets
+        if self.previous_solution is not None and num_sockets >= self.previous_num_sockets:
+            for variable, value in zip((Y, U, Z, B, A), self.previous_solution):
+                variable.Start = value
+        else:
+            for variable in (Y, U, Z, B, A):
+                variable.Start = GRB.UNDEFINED
+
+        model_build_time = self.pending_build_time + time.time() - model_update_start_time
+        self.pending_build_time = 0
+
+        callback, recorder = self.gurobi.create_callback(self.optimization_instance.with_num_sockets(num_sockets))
+
+        optimization_start_time = time.time()
+        self.model._stopped_at_bound = False
+        self.model.optimize(callback)
+        optimization_end_time = time.time()
+
+        if self.model.SolCount > 0:
+            self.previous_solution = (Y.X, U.X, Z.X, B.X, A.X)
+            self.previous_num_sockets = num_sockets
+
+        result = self.gurobi.extract_result(self.optimization_instance, self.model, self.variables, model_build_time, optimization_end_time - optimization_start_time)
+        if recorder is not None:
+            result['solver_trace'] = recorder.finish(self.model)
+        return result
+
+    def close(self) -> None:
+        self.model.dispose()
@@ -1,23 +1,27 @@
 import math
 import numpy as np
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Entities.schedule import Schedule
+from Algorithms.instrumentation import Instrumentation
 
 class HeuristicOptimization:
-    def __init__(self):
+    def __init__(self, instrumentation: Optional[Instrumentation] = None):
         self.name = "Heuristic Optimization"
+        self.instrumentation = instrumentation or Instrumentation()  # Per-phase timing hooks, a no-op by default
 
-    def calculate_current_battery_levels(self, B_matrix, r, d, Y_matrix, U_matrix, t, delta_t):
+    def calculate_current_battery_levels(self, B_matrix, r, d, Y_previous, U_previous, t, delta_t):
         if t > 0:
             for i in range(len(B_matrix)):
-                B_matrix[i, t] = B_matrix[i, t - 1] + Y_matrix[i, t - 1] * r[i] * delta_t + Y_matrix[i, t - 1] * U_matrix[i, t - 1] * d[i] * delta_t - U_matrix[i, t - 1] * d[i] * delta_t
+                B_matrix[i, t] = B_matrix[i, t - 1] + Y_previous[i] * r[i] * delta_t + Y_previous[i] * U_previous[i] * d[i] * delta_t - U_previous[i] * d[i] * delta_t
 
     def forecast_next_battery_levels(self, B_matrix, d, t, delta_t):
         return B_matrix[:, t] - d * delta_t
 
-    def allocate_sockets(self, forecasted_battery_levels, U_matrix, num_sockets, t, r, d):
-        sockets_allocated = np.zeros_like(U_matrix[:, t])
+    def allocate_sockets(self, forecasted_battery_levels, U_column, schedule, num_sockets, r, d):
+        sockets_allocated = np.zeros_like(U_column)
         num_students = len(forecasted_battery_levels)
         
         students_needing_sockets = np.where(forecasted_battery_levels < 0)[0]
@@ -25,17 +29,18 @@ class HeuristicOptimization:
         if len(students_needing_sockets) <= num_sockets:
             sockets_allocated[students_needing_sockets] = 1
         else:
-            sorted_students = sorted(students_needing_sockets, key=lambda i: (np.sum(U_matrix[i, :t]), forecasted_battery_levels[i], r[i] - d[i]))
+            usage = schedule.usage()  # Slots from t on are still unset
+            sorted_students = sorted(students_needing_sockets, key=lambda i: (usage[i], forecasted_battery_levels[i], r[i] - d[i]))
             sockets_allocated[sorted_students[:num_sockets]] = 1
 
         for i in range(num_students):
             if sockets_allocated[i] == 1:
-                U_matrix[i, t] = 1
+                U_column[i] = 1
 
         return sockets_allocated
 
-    def distribute_remaining_sockets(self, forecasted_battery_levels, Y_matrix, U_matrix, num_remaining_sockets, r, d, t, delta_t):
-        students_without_sockets = np.where(Y_matrix[:, t] == 0)[0]
+    def distribute_remaining_sockets(self, forecasted_battery_levels, Y_column, U_column, num_remaining_sockets, r, d, delta_t):
+        students_without_sockets = np.where(Y_column == 0)[0]
 
         if num_remaining_sockets > 0:
             sorted_students = sorted(students_without_sockets, key=lambda i: forecasted_battery_levels[i])
@@ -43,54 +48,67 @@ class HeuristicOptimization:
 
             for i in sorted_students[:allocated_sockets]:
                 if forecasted_battery_levels[i] + r[i] * delta_t + d[i] * delta_t <= 100:
-                    Y_matrix[i, t] = 1
-                    if U_matrix[i, t] == 0:
-                        U_matrix[i, t] = 1
+                    Y_column[i] = 1
+                    if U_column[i] == 0:
+                        U_column[i] = 1
 
-    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> Dict:
-        students = optimization_instance.students
-        num_students = len(students)
+    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> OptimizationResult:
+        num_students = optimization_instance.num_students
         total_available_time = optimization_instance.total_time
         delta_t = optimization_instance.delta_t
         num_sockets = optimization_instance.num_sockets
 
-        r = np.array([s.recharge_rate for s in students])
-        d = np.array([s.discharge_rate for s in students])
-        b0 = np.array([s.initial_battery for s in students])
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+        b0 = optimization_instance.initial_batteries
 
         num_time_slots = math.ceil(total_available_time / delta_t)
 
         B_matrix = np.zeros((num_students, num_time_slots + 1))
         B_matrix[:, 0] = b0
 
-        Y_matrix = np.zeros((num_students, num_time_slots))
-        U_matrix = np.zeros((num_students, num_time_slots))
+        schedule = Schedule(num_students, num_time_slots)
+        Y_column = np.zeros(num_students)
+        U_column = np.zeros(num_students)
+
+        instrumentation = self.instrumentation
+        instrumentation.start()
+        instrumentation.record_allocation('B', B_matrix.nbytes)
+        instrumentation.record_allocation('Y', schedule.Y_bits.nbytes)
+        instrumentation.record_allocation('U', schedule.U_bits.nbytes)
 
         start_time = time.time()
 
         for t in range(num_time_slots):
-            self.calculate_current_battery_levels(B_matrix, r, d, Y_matrix, U_matrix, t, delta_t)
-            forecasted_battery_levels = self.forecast_next_battery_levels(B_matrix, d, t, delta_t)
-            U_matrix[:, t] = (forecasted_battery_levels >= 0).astype(int)
-            Y_matrix[:, t] = self.allocate_sockets(forecasted_battery_levels, U_matrix, num_sockets, t, r, d)
-
-            remaining_sockets = num_sockets - np.sum(Y_matrix[:, t])
-            if remaining_sockets > 0:
-                self.distribute_remaining_sockets(forecasted_battery_levels, Y_matrix, U_matrix, remaining_sockets, r, d, t, delta_t)
+            with instrumentation.phase('battery_update'):
+                self.calculate_current_battery_levels(B_matrix, r, d, Y_column, U_column, t, delta_t)
+            with instrumentation.phase('forecast'):
+                forecasted_battery_levels = self.forecast_next_battery_levels(B_matrix, d, t, delta_t)
+                U_column = (forecasted_battery_levels >= 0).astype(float)
+            with instrumentation.phase('socket_ranking'):
+                Y_column = self.allocate_sockets(forecasted_battery_levels, U_column, schedule, num_sockets, r, d)
+
+            with instrumentation.phase('redistribution'):
+                remaining_sockets = num_sockets - np.sum(Y_column)
+                if remaining_sockets > 0:
+                    self.distribute_remaining_sockets(forecasted_battery_levels, Y_column, U_column, remaining_sockets, r, d, delta_t)
+                schedule.set_slot(t, U_column, Y_column)
 
         end_time = time.time()
-        A = (np.sum(U_matrix) / (num_time_slots * num_students))
-        Z = np.min(np.sum(U_matrix, axis=1))
-        result = {
-            'fair_maximized_usage_score': ( A+ Z),
-            'min_usage_time': Z,
-            'A': A,
-            'U': U_matrix.tolist(),
-            'Y': Y_matrix.tolist(),
-            'B': B_matrix[:, :-1].tolist(),  # excluding the last time slot for battery levels
-            'optimization_time': end_time - start_time,
-            'model_build_time': 0,  # No separate model build time for heuristic
-            'status': 'optimal'
-        }
+        usage = schedule.usage()
+        A = (np.sum(usage) / (num_time_slots * num_students))
+        Z = np.min(usage)
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=( A+ Z),
+            min_usage_time=Z,
+            A=A,
+            schedule=schedule,
+            B=B_matrix[:, :-1],  # excluding the last time slot for battery levels
+            optimization_time=end_time - start_time,
+            model_build_time=0  # No separate model build time for heuristic
+        )
+        if instrumentation.enabled:
+            result['profile'] = instrumentation.report()
 
         return result
@@ -0,0 +1,226 @@
+import math
+import numpy as np
+import time
+from typing import List
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Entities.schedule import Schedule
+
+class VectorizedHeuristicOptimization:
+    """Array-at-a-time version of HeuristicOptimization.
+
+    Every slot is processed with whole-array operations and a running per-student
+    usage counter, and students are ranked with argpartition/lexsort instead of a
+    full Python sort. It returns exactly the same U, Y and B as HeuristicOptimization.
+    Only the current slot's U and Y columns are kept unpacked, the schedule is written
+    slot by slot into a bit-packed Schedule.
+    optimize_allocations runs a whole stack of same-shaped instances in one pass.
+    """
+
+    def __init__(self):
+        self.name = "Vectorized Heuristic Optimization"
+
+    def calculate_current_battery_levels(self, B_matrix, r, d, Y_previous, U_previous, t, delta_t):
+        if t > 0:
+            B_matrix[:, t] = B_matrix[:, t - 1] + Y_previous * r * delta_t + Y_previous * U_previous * d * delta_t - U_previous * d * delta_t
+
+    def forecast_next_battery_levels(self, B_matrix, d, t, delta_t):
+        return B_matrix[:, t] - d * delta_t
+
+    def select_first(self, candidates, count, primary, *secondary):
+        """Return the `count` candidates a stable sort on (primary, *secondary) puts first.
+
+        `candidates` must be in ascending index order so ties resolve like Python's sorted().
+        """
+        if count <= 0:
+            return candidates[:0]
+        if count >= len(candidates):
+            return candidates
+
+        primary_values = primary[candidates]
+        cutoff = np.partition(primary_values, count - 1)[count - 1]
+        below = candidates[primary_values < cutoff]
+        tied = candidates[primary_values == cutoff]
+        # Ties on a key are broken by partitioning again on the next one, never by sorting the whole tied group
+        if secondary:
+            tied = self.select_first(tied, count - len(below), *secondary)
+
+        return np.concatenate((below, tied[:count - len(below)]))
+
+    def allocate_sockets(self, forecasted_battery_levels, usage, U_column, num_sockets, rate_balance):
+        sockets_allocated = np.zeros_like(U_column)
+
+        students_needing_sockets = np.flatnonzero(forecasted_battery_levels < 0)
+        selected = self.select_first(students_needing_sockets, num_sockets, usage, forecasted_battery_levels, rate_balance)
+
+        sockets_allocated[selected] = 1
+        U_column[selected] = 1
+
+        return sockets_allocated
+
+    def distribute_remaining_sockets(self, forecasted_battery_levels, Y_column, U_column, num_remaining_sockets, r, d, delta_t):
+        students_without_sockets = np.flatnonzero(Y_column == 0)
+        selected = self.select_first(students_without_sockets, int(num_remaining_sockets), forecasted_battery_levels)
+
+        fits = forecasted_battery_levels[selected] + r[selected] * delta_t + d[selected] * delta_t <= 100
+        Y_column[selected[fits]] = 1
+        U_column[selected[fits]] = 1
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> OptimizationResult:
+        num_students = optimization_instance.num_students
+        total_available_time = optimization_instance.total_time
+        delta_t = optimization_instance.delta_t
+        num_sockets = optimization_instance.num_sockets
+
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+        b0 = optimization_instance.initial_batteries
+
+        num_time_slots = math.ceil(total_available_time / delta_t)
+
+        B_matrix = np.zeros((num_students, num_time_slots + 1))
+        B_matrix[:, 0] = b0
+
+        schedule = Schedule(num_students, num_time_slots)
+        Y_column = np.zeros(num_students)
+        U_column = np.zeros(num_students)
+
+        start_time = time.time()
+
+        usage = np.zeros(num_students, dtype=np.int64)  # running schedule.usage()
+        rate_balance = r - d
+
+        for t in range(num_time_slots):
+            self.calculate_current_battery_levels(B_matrix, r, d, Y_column, U_column, t, delta_t)
+            forecasted_battery_levels = self.forecast_next_battery_levels(B_matrix, d, t, delta_t)
+            U_column = (forecasted_battery_levels >= 0).astype(float)
+            Y_column = self.allocate_sockets(forecasted_battery_levels, usage, U_column, num_sockets, rate_balance)
+
+            remaining_sockets = num_sockets - np.sum(Y_column)
+            if remaining_sockets > 0:
+                self.distribute_remaining_sockets(forecasted_battery_levels, Y_column, U_column, remaining_sockets, r, d, delta_t)
+
+            schedule.set_slot(t, U_column, Y_column)
+            usage += U_column.astype(np.int64)
+
+        end_time = time.time()
+        A = (np.sum(usage) / (num_time_slots * num_students))
+        Z = np.min(usage)
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=( A+ Z),
+            min_usage_time=Z,
+            A=A,
+            schedule=schedule,
+            B=B_matrix[:, :-1],  # excluding the last time slot for battery levels
+            optimization_time=end_time - start_time,
+            model_build_time=0  # No separate model build time for heuristic
+        )
+
+        return result
+
+    def select_rows(self, eligible, count, primary, *secondary):
+        """Row-wise select_first: mark the first `count[m]` eligible elements of each row m.
+
+        Rows are cut down to the contenders whose primary key does not exceed the
+        count-th smallest one, and only those are lexsorted on the remaining keys.
+        """
+        num_rows, num_columns = eligible.shape
+        selected = np.zeros_like(eligible)
+        count = np.minimum(count.reshape(num_rows), num_columns)
+        kth = int(count.max(initial=0))
+        if kth == 0:
+            return selected
+
+        primary = np.where(eligible, primary, np.inf)
+        smallest = np.sort(np.partition(primary, kth - 1, axis=-1)[:, :kth], axis=-1)
+        cutoff = np.where(count > 0, smallest[np.arange(num_rows), np.maximum(count - 1, 0)], -np.inf)
+        contenders = eligible & (primary <= cutoff[:, None])
+
+        # Gather each row's contenders to the front, in index order so ties stay stable
+        width = int(contenders.sum(axis=-1).max())
+        columns = np.argsort(~contenders, axis=-1, kind='stable')[:, :width]
+        valid = np.take_along_axis(contenders, columns, axis=-1)
+        keys = tuple(np.take_along_axis(key, columns, axis=-1) for key in reversed((primary,) + secondary))
+        order = np.lexsort(keys + (~valid,), axis=-1)
+
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(width), axis=-1)
+        np.put_along_axis(selected, columns, valid & (ranks < count[:, None]), axis=-1)
+        return selected
+
+    def optimize_allocations(self, optimization_instances: List[OptimizationInstance]) -> List[OptimizationResult]:
+        """Run the heuristic on a stack of instances over (instance, student, slot) arrays.
+
+        All instances must share the number of students, total_time and delta_t, while
+        num_sockets may differ. The results match one optimize_allocation call per instance.
+        The batch wall time is shared equally between the instances as optimization_time.
+        """
+        first_instance = optimization_instances[0]
+        num_instances = len(optimization_instances)
+        num_students = first_instance.num_students
+        delta_t = first_instance.delta_t
+        num_time_slots = math.ceil(first_instance.total_time / delta_t)
+
+        for optimization_instance in optimization_instances:
+            if (optimization_instance.num_students != num_students or optimization_instance.delta_t != delta_t
+                    or math.ceil(optimization_instance.total_time / optimization_instance.delta_t) != num_time_slots):
+                raise ValueError("Batched instances must share the number of students, total_time and delta_t")
+
+        r = np.stack([instance.recharge_rates for instance in optimization_instances])
+        d = np.stack([instance.discharge_rates for instance in optimization_instances])
+        b0 = np.stack([instance.initial_batteries for instance in optimization_instances])
+        num_sockets = np.array([instance.num_sockets for instance in optimization_instances])[:, None]
+
+        # Stored slot-major so each step reads and writes contiguous (instance, student) planes
+        B_slots = np.zeros((num_time_slots + 1, num_instances, num_students))
+        B_slots[0] = b0
+
+        schedules = [Schedule(num_students, num_time_slots) for _ in range(num_instances)]
+        Y_previous = np.zeros((num_instances, num_students))
+        U_previous = np.zeros((num_instances, num_students))
+
+        start_time = time.time()
+
+        usage = np.zeros((num_instances, num_students), dtype=np.int64)
+        rate_balance = r - d
+
+        for t in range(num_time_slots):
+            if t > 0:
+                B_slots[t] = B_slots[t - 1] + Y_previous * r * delta_t + Y_previous * U_previous * d * delta_t - U_previous * d * delta_t
+            forecasted_battery_levels = B_slots[t] - d * delta_t
+
+            # Students that would run flat come first, ranked like allocate_sockets
+            needing_sockets = forecasted_battery_levels < 0
+            allocated = self.select_rows(needing_sockets, num_sockets, usage, forecasted_battery_levels, rate_balance)
+
+            # Leftover sockets go to the lowest forecasts, like distribute_remaining_sockets
+            remaining_sockets = num_sockets - np.sum(allocated, axis=1, keepdims=True)
+            topped_up = (self.select_rows(~allocated, remaining_sockets, forecasted_battery_levels)
+                         & (forecasted_battery_levels + r * delta_t + d * delta_t <= 100))
+
+            in_use = ~needing_sockets | allocated | topped_up
+            Y_previous = (allocated | topped_up).astype(float)
+            U_previous = in_use.astype(float)
+            for m, schedule in enumerate(schedules):
+                schedule.set_slot(t, in_use[m], allocated[m] | topped_up[m])
+            usage += in_use
+
+        end_time = time.time()
+
+        results = []
+        for m, schedule in enumerate(schedules):
+            A = (np.sum(usage[m]) / (num_time_slots * num_students))
+            Z = np.min(usage[m])
+            results.append(OptimizationResult(
+                status='optimal',
+                fair_maximized_usage_score=( A+ Z),
+                min_usage_time=Z,
+                A=A,
+                schedule=schedule,
+                B=B_slots[:-1, m].T,  # excluding the last time slot for battery levels
+                optimization_time=(end_time - start_time) / num_instances,
+                model_build_time=0  # No separate model build time for heuristic
+            ))
+
+        return results
@@ -0,0 +1,143 @@
+from typing import Optional
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import milp, LinearConstraint, Bounds
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+import time
+import math
+
+class HighsOptimization:
+    """The GurobiOptimization model solved with SciPy's bundled HiGHS, so no Gurobi license is needed.
+
+    The variables are stacked into one vector [Y, U, B, Z, A], with Y, U and B flattened row-major,
+    and every constraint family is assembled directly as sparse coordinates.
+    """
+
+    def __init__(self):
+        self.name = "HiGHS Optimization"
+        self.exact = True
+
+    def build_constraints(self, r, d, b0, num_sockets, num_students, num_time_slots, delta_t, prior_usage=None):
+        num_cells = num_students * num_time_slots
+        y_offset = 0
+        u_offset = num_cells
+        b_offset = 2 * num_cells
+        z_index = b_offset + num_students * (num_time_slots + 1)
+        a_index = z_index + 1
+
+        students = np.arange(num_students)
+        cell_students = np.repeat(students, num_time_slots)
+        cell_slots = np.tile(np.arange(num_time_slots), num_students)
+        cells = np.arange(num_cells)
+        battery_columns = b_offset + cell_students * (num_time_slots + 1) + cell_slots
+
+        rows, columns, values, lower, upper = [], [], [], [], []
+        num_rows = 0
+
+        def add_rows(row_indices, column_indices, coefficients, row_lower, row_upper):
+            nonlocal num_rows
+            rows.append(num_rows + row_indices)
+            columns.append(column_indices)
+            values.append(np.broadcast_to(coefficients, column_indices.shape))
+            lower.append(row_lower)
+            upper.append(row_upper)
+            num_rows += len(row_lower)
+
+        # init_battery: B[i, 0] == b0[i]
+        add_rows(students, b_offset + students * (num_time_slots + 1), 1.0, b0, b0)
+
+        # sum_of_usage: sum_t U[i, t] - Z >= -prior_usage[i]
+        add_rows(np.concatenate((cell_students, students)),
+                 np.concatenate((u_offset + cells, np.full(num_students, z_index))),
+                 np.concatenate((np.ones(num_cells), -np.ones(num_students))),
+                 np.zeros(num_students) if prior_usage is None else -np.asarray(prior_usage, dtype=float), np.full(num_students, np.inf))
+
+        # battery_dynamics: B[i, t + 1] - B[i, t] - (r + d) * delta_t * Y[i, t] + d * delta_t * U[i, t] == 0
+        add_rows(np.tile(cells, 4),
+                 np.concatenate((battery_columns + 1, battery_columns, y_offset + cells, u_offset + cells)),
+                 np.concatenate((np.ones(num_cells), -np.ones(num_cells),
+                                 -np.repeat((r + d) * delta_t, num_time_slots), np.repeat(d * delta_t, num_time_slots))),
+                 np.zeros(num_cells), np.zeros(num_cells))
+
+        # socket_avail: sum_i Y[i, t] <= num_sockets
+        add_rows(cell_slots, y_offset + cells, 1.0, np.full(num_time_slots, -np.inf), np.full(num_time_slots, num_sockets))
+
+        # average_usage: sum U / (N * T) - A == 0
+        add_rows(np.zeros(num_cells + 1, dtype=int), np.append(u_offset + cells, a_index),
+                 np.append(np.full(num_cells, 1 / num_cells), -1.0), np.zeros(1), np.zeros(1))
+
+        # U[i, t] >= Y[i, t]
+        add_rows(np.tile(cells, 2), np.concatenate((u_offset + cells, y_offset + cells)),
+                 np.concatenate((np.ones(num_cells), -np.ones(num_cells))),
+                 np.zeros(num_cells), np.full(num_cells, np.inf))
+
+        matrix = sp.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))), shape=(num_rows, a_index + 1))
+        return LinearConstraint(matrix, np.concatenate(lower), np.concatenate(upper))
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance, prior_usage: Optional[np.ndarray] = None,
+                            terminal_battery_weight: float = 0) -> OptimizationResult:
+        num_students = optimization_instance.num_students
+        total_available_time = optimization_instance.total_time
+        delta_t = optimization_instance.delta_t
+
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+        b0 = optimization_instance.initial_batteries
+
+        num_time_slots = math.ceil(total_available_time / delta_t)
+        num_cells = num_students * num_time_slots
+        num_batteries = num_students * (num_time_slots + 1)
+
+        model_build_start_time = time.time()
+        constraints = self.build_constraints(r, d, b0, optimization_instance.num_sockets, num_students, num_time_slots, delta_t, prior_usage)
+
+        # Maximize Z + A, written as a minimization
+        objective = np.zeros(2 * num_cells + num_batteries + 2)
+        objective[-2:] = -1
+        # Optional reward for the batteries left after the last slot
+        objective[2 * num_cells + num_time_slots:2 * num_cells + num_batteries:num_time_slots + 1] = -terminal_battery_weight
+
+        integrality = np.concatenate((np.ones(2 * num_cells), np.zeros(num_batteries), [1, 0]))
+        upper_bounds = np.concatenate((np.ones(2 * num_cells), np.full(num_batteries, 100.0), [np.inf, np.inf]))
+        bounds = Bounds(np.zeros_like(upper_bounds), upper_bounds)
+
+        options = {'disp': False}
+        if optimization_instance.time_limit > 0:
+            options['time_limit'] = optimization_instance.time_limit
+        model_build_end_time = time.time()
+
+        optimization_start_time = time.time()
+        solution = milp(objective, constraints=constraints, integrality=integrality, bounds=bounds, options=options)
+        optimization_end_time = time.time()
+
+        # Status 1 means a limit was hit, which the Gurobi backend also reports as 'optimal' when it has an incumbent
+        if solution.status in (0, 1) and solution.x is not None:
+            x = solution.x
+            Y_matrix = np.round(x[:num_cells]).reshape(num_students, num_time_slots)
+            U_matrix = np.round(x[num_cells:2 * num_cells]).reshape(num_students, num_time_slots)
+            B_matrix = x[2 * num_cells:2 * num_cells + num_batteries].reshape(num_students, num_time_slots + 1)
+            Z = float(round(x[-2]))
+            A = x[-1]
+
+            result = OptimizationResult(
+                status='optimal',
+                fair_maximized_usage_score=Z + A,
+                min_usage_time=Z,
+                A=A,
+                U=U_matrix,
+                Y=Y_matrix,
+                B=B_matrix,
+                model_build_time=model_build_end_time - model_build_start_time,
+                optimization_time=optimization_end_time - optimization_start_time
+            )
+            if solution.status == 1:
+                result['stopped_early'] = 'time_limit'
+            return result
+        else:
+            result = OptimizationResult(
+                status='not_optimal',
+                model_build_time=model_build_end_time - model_build_start_time,
+                optimization_time=optimization_end_time - optimization_start_time
+            )
+            return result
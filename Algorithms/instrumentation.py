@@ -0,0 +1,100 @@
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+NULL_PHASE = nullcontext()
+
+class Instrumentation:
+    """Hooks the algorithms call around their phases.
+
+    This base class does nothing: a phase costs one method call and entering a shared null context,
+    and nothing is added to the result. Subclass it to collect something, as PhaseProfiler does.
+    """
+
+    enabled = False
+
+    def start(self) -> None:
+        """Called at the start of each optimize_allocation, before the first phase."""
+
+    def phase(self, name: str):
+        """Context manager around one execution of the named phase."""
+        return NULL_PHASE
+
+    def record_allocation(self, name: str, nbytes: int) -> None:
+        """Size of a large array the algorithm allocated, e.g. one of the N x T matrices."""
+
+    def report(self) -> Optional[Dict]:
+        """What to store in the result under 'profile'."""
+        return None
+
+    def cache_settings(self) -> Dict:
+        """The configuration ResultCache keys on, leaving out what is collected during a run."""
+        return {}
+
+class PhaseProfiler(Instrumentation):
+    """Adds up the wall time and number of calls of every phase.
+
+    With trace_memory, tracemalloc also records the peak memory allocated within each phase, above
+    what was allocated when the phase started. It is started on demand, slows down pure Python code
+    noticeably, and can't see memory allocated inside solver libraries. Phases must not be nested
+    when tracing memory, since each phase resets the tracemalloc peak.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.started_tracing = False
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.allocations: Dict[str, int] = {}
+
+    def start(self) -> None:
+        self.phases = {}
+        self.allocations = {}
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def phase(self, name: str) -> '_ProfiledPhase':
+        return _ProfiledPhase(self, name)
+
+    def record_allocation(self, name: str, nbytes: int) -> None:
+        self.allocations[name] = self.allocations.get(name, 0) + int(nbytes)
+
+    def add(self, name: str, elapsed: float, peak_bytes: Optional[int]) -> None:
+        phase = self.phases.setdefault(name, {'time': 0.0, 'calls': 0})
+        phase['time'] += elapsed
+        phase['calls'] += 1
+        if peak_bytes is not None:
+            phase['peak_memory_mb'] = max(phase.get('peak_memory_mb', 0.0), peak_bytes / 2 ** 20)
+
+    def report(self) -> Dict:
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        return {'phases': self.phases, 'allocations_mb': {name: nbytes / 2 ** 20 for name, nbytes in self.allocations.items()}}
+
+    def cache_settings(self) -> Dict:
+        return {'trace_memory': self.trace_memory}
+
+class _ProfiledPhase:
+    __slots__ = ('profiler', 'name', 'start_time', 'start_memory')
+
+    def __init__(self, profiler: PhaseProfiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start_memory = None
+        if self.profiler.trace_memory and tracemalloc.is_tracing():
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.start_time = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.start_time
+        peak_bytes = None
+        if self.start_memory is not None:
+            peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - self.start_memory)
+        self.profiler.add(self.name, elapsed, peak_bytes)
@@ -0,0 +1,269 @@
+import numpy as np
+import time
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
+
+class LocalSearchOptimization:
+    """Improves the heuristic's schedule with socket moves until a wall-clock budget runs out.
+
+    Each round applies three kinds of move, each evaluated for all students at once:
+    - activation: an idle student works in a slot where its battery stays non-negative afterwards,
+    - transfer: a student takes a socket in slot t, either a free one or one handed over by a charging
+      student, who keeps working on battery or stops for that slot,
+    - swap: a student charges in an earlier idle slot t1 instead of t2, exchanging the two socket
+      slots with a student that charges in t1, or using a free socket in t1.
+
+    Changing a student's schedule in one slot shifts its battery by a constant for the rest of the
+    horizon, so a move is feasible iff the battery minimum and maximum over the affected slots stay
+    within [0, 100]. These come from per-student suffix and running extremes of the current battery,
+    and only the rows of moved students are re-simulated. Moves never take a student below Z and
+    never lower the total usage, so the score never decreases.
+    """
+
+    tolerance = 1e-9
+
+    def __init__(self, time_budget: float = 1.0, initial_solver=None):
+        self.name = "Local Search Optimization"
+        self.time_budget = time_budget  # Seconds of search after the initial schedule
+        self.initial_solver = initial_solver or VectorizedHeuristicOptimization()
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> OptimizationResult:
+        start_time = time.time()
+        initial_result = self.initial_solver.optimize_allocation(optimization_instance)
+        deadline = time.time() + self.time_budget
+
+        Y_matrix, U_matrix, B_matrix, num_moves = self.improve(optimization_instance, initial_result['Y'], initial_result['U'], deadline)
+        end_time = time.time()
+
+        num_students, num_time_slots = U_matrix.shape
+        A = (np.sum(U_matrix) / (num_time_slots * num_students))
+        Z = np.min(np.sum(U_matrix, axis=1))
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=( A+ Z),
+            min_usage_time=Z,
+            A=A,
+            U=U_matrix,
+            Y=Y_matrix,
+            B=B_matrix[:, :-1],  # excluding the last time slot for battery levels, like the heuristic
+            optimization_time=end_time - start_time,
+            model_build_time=0,
+            initial_score=initial_result['fair_maximized_usage_score'],
+            num_moves=num_moves
+        )
+        if end_time >= deadline:
+            result['stopped_early'] = 'time_limit'  # The search may not have converged
+
+        return result
+
+    def improve(self, optimization_instance: OptimizationInstance, Y_matrix, U_matrix, deadline: float):
+        """Apply improving moves to (Y, U) until none is left or deadline passes.
+
+        Returns Y, U, the (N, T + 1) battery levels and the number of moves applied.
+        """
+        delta_t = optimization_instance.delta_t
+        num_sockets = optimization_instance.num_sockets
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+        b0 = optimization_instance.initial_batteries
+
+        Y = np.asarray(Y_matrix) > 0.5
+        U = np.asarray(U_matrix) > 0.5
+        num_time_slots = U.shape[1]
+        charge_gain = r * delta_t  # Battery gained in a slot of charging (while in use)
+        use_loss = d * delta_t  # Battery lost in a slot of use on battery
+
+        B = self.simulate(b0, r, d, delta_t, Y, U)
+        suffix_min, suffix_max = self.suffix_extremes(B)
+        usage = U.sum(axis=1)
+        socket_count = Y.sum(axis=0)
+
+        def update_rows(students):
+            B[students] = self.simulate(b0[students], r[students], d[students], delta_t, Y[students], U[students])
+            suffix_min[students], suffix_max[students] = self.suffix_extremes(B[students])
+            usage[students] = U[students].sum(axis=1)
+
+        def activate():
+            # One activation per student, in the latest feasible slot
+            feasible = ~U & (suffix_min >= use_loss[:, None] - self.tolerance)
+            students = np.flatnonzero(feasible.any(axis=1))
+            if len(students) > 0:
+                U[students, num_time_slots - 1 - np.argmax(feasible[students, ::-1], axis=1)] = True
+                update_rows(students)
+            return len(students)
+
+        num_moves = 0
+        while time.time() < deadline:
+            moved = activate()
+
+            # Transfers and swaps are evaluated on the same state, so each student moves at most once per round
+            moves = self.find_transfers(Y, U, usage, socket_count, num_sockets, suffix_min, suffix_max, charge_gain, use_loss)
+            moves += self.find_swaps(Y, U, B, usage, socket_count, num_sockets, suffix_min, suffix_max, charge_gain, use_loss)
+            moves.sort(key=lambda move: (-move[0], usage[move[2][0][0]]))
+
+            used_students = set()
+            for _, slot_changes, cell_changes in moves:
+                students = {student for student, _, _, _ in cell_changes}
+                if used_students & students or any(socket_count[t] + change > num_sockets for t, change in slot_changes):
+                    continue
+                for student, t, charging, in_use in cell_changes:
+                    Y[student, t] = charging
+                    U[student, t] = in_use
+                for t, change in slot_changes:
+                    socket_count[t] += change
+                used_students |= students
+                moved += 1
+            # Every student moved at most once, so the evaluations above stay valid until the rows are re-simulated here
+            if used_students:
+                update_rows(np.array(sorted(used_students)))
+
+            num_moves += moved
+            if moved == 0:
+                break
+
+        # Moves that count on a later activation must not be left without it when the budget runs out
+        num_moves += activate()
+        return Y.astype(float), U.astype(float), B, num_moves
+
+    def find_transfers(self, Y, U, usage, socket_count, num_sockets, suffix_min, suffix_max, charge_gain, use_loss):
+        """Transfers into every slot t, as (value, socket count changes, cell changes).
+
+        The receiver either was idle in t, which gains a slot of use, or worked on battery, which pays
+        off if the battery it gains lets it work in a later idle slot (taken by the next activations).
+        Receivers are paired with free sockets first, then with donors that keep working, then with
+        donors that stop.
+        """
+        num_students, num_time_slots = U.shape
+        tolerance = self.tolerance
+        Z = usage.min()
+        idle = ~U
+        gain = np.where(idle, charge_gain[:, None], (charge_gain + use_loss)[:, None])
+        receivable = ~Y & (suffix_max + gain <= 100 + tolerance)
+        # Largest suffix minimum over the idle slots after t, i.e. the easiest later slot to activate
+        later_idle_min = np.where(idle, suffix_min, -np.inf)
+        later_idle_min = np.concatenate((np.maximum.accumulate(later_idle_min[:, :0:-1], axis=1)[:, ::-1],
+                                         np.full((num_students, 1), -np.inf)), axis=1)
+        value = idle.astype(np.int64) + (later_idle_min + gain >= use_loss[:, None] - tolerance)
+        value[~receivable] = 0
+
+        keeps_working = Y & (suffix_min >= (charge_gain + use_loss)[:, None] - tolerance)
+        can_stop = Y & (suffix_min >= charge_gain[:, None] - tolerance) & (usage - 1 > Z)[:, None]
+
+        moves = []
+        for t in np.flatnonzero((value > 0).any(axis=0)):
+            # The most valuable, then least used, receivers get the most used donors
+            receivers = np.flatnonzero(value[:, t] > 0)
+            receivers = receivers[np.lexsort((usage[receivers], -value[receivers, t]))]
+            keep_donors = self.most_used(np.flatnonzero(keeps_working[:, t]), usage)
+            stop_donors = self.most_used(np.flatnonzero(can_stop[:, t]), usage)
+            num_free = num_sockets - socket_count[t]
+
+            for rank, receiver in enumerate(receivers):
+                receive = (receiver, t, True, True)
+                if rank < num_free:
+                    moves.append((value[receiver, t], [(t, 1)], [receive]))
+                elif rank - num_free < len(keep_donors):
+                    moves.append((value[receiver, t], [], [receive, (keep_donors[rank - num_free], t, False, True)]))
+                elif rank - num_free - len(keep_donors) < len(stop_donors):
+                    # A stopping donor loses a slot, so that only pays off for two slots of gain or for taking a student off Z
+                    if value[receiver, t] >= 2 or (idle[receiver, t] and usage[receiver] == Z):
+                        moves.append((value[receiver, t] - 1, [], [receive, (stop_donors[rank - num_free - len(keep_donors)], t, False, False)]))
+                else:
+                    break
+        return moves
+
+    def find_swaps(self, Y, U, B, usage, socket_count, num_sockets, suffix_min, suffix_max, charge_gain, use_loss):
+        """Swaps of an earlier slot t1 with a later slot t2, as (value, socket count changes, cell changes).
+
+        The mover is idle in t1 and charges in t2 > t1. Charging in t1 instead raises its battery over
+        (t1, t2] and, as it keeps working in t2, lowers it by one slot of use after t2. The partner
+        charges in t1 and not in t2 and takes the socket in t2. It keeps working in t1, or stops in t1;
+        stopping costs it a slot unless it was idle in t2, or it gains a slot of battery after t2 that
+        it can spend in a later idle slot (taken by the next activations). Without a partner the mover
+        uses a free socket in t1.
+        """
+        num_time_slots = U.shape[1]
+        tolerance = self.tolerance
+        later_idle = np.zeros_like(U)
+        later_idle[:, :-1] = np.logical_or.accumulate(~U[:, :0:-1], axis=1)[:, ::-1]
+        # Only students with an idle slot and a charge after which they can afford another slot of use can move
+        can_move = (~U).any(axis=1) & (Y & (suffix_min >= use_loss[:, None] - tolerance)).any(axis=1)
+
+        moves = []
+        for t1 in range(num_time_slots - 1):
+            mover_rows = np.flatnonzero(can_move & ~U[:, t1])
+            if len(mover_rows) == 0:
+                continue
+            t2 = np.arange(t1 + 1, num_time_slots)
+            # Battery extremes over (t1, t2] and after t2, one column per t2
+            movers = Y[mover_rows][:, t2] & (
+                np.maximum.accumulate(B[mover_rows, t1 + 1:num_time_slots], axis=1) + charge_gain[mover_rows, None] <= 100 + tolerance) & (
+                suffix_min[mover_rows, t1 + 1:] >= use_loss[mover_rows, None] - tolerance)
+            if not movers.any():
+                continue
+
+            partner_rows = np.flatnonzero(Y[:, t1])
+            middle_min = np.minimum.accumulate(B[partner_rows, t1 + 1:num_time_slots], axis=1)
+            after_min = suffix_min[partner_rows, t1 + 1:]
+            after_max = suffix_max[partner_rows, t1 + 1:]
+            partner_gain = charge_gain[partner_rows, None]
+            partner_loss = use_loss[partner_rows, None]
+            partners = ~Y[partner_rows][:, t2]
+            idle_t2 = ~U[partner_rows][:, t2]
+            keeps = partners & (middle_min >= partner_gain + partner_loss - tolerance)
+            # Keeping on in t1 and charging in a slot it worked in changes nothing after t2, charging in an idle one adds a slot
+            keep_value = np.where(keeps & ~idle_t2, 0, -1)
+            keep_value = np.where(keeps & idle_t2 & (after_min >= partner_loss - tolerance), 1, keep_value)
+            stops = partners & (middle_min >= partner_gain - tolerance)
+            stop_value = np.where(idle_t2 | ((after_max + partner_loss <= 100 + tolerance) & later_idle[partner_rows][:, t2]), 0, -1)
+            partner_value = np.where(stops, np.maximum(keep_value, stop_value), keep_value)
+
+            num_free = num_sockets - socket_count[t1]
+            used_students = set()
+            for k in np.flatnonzero(movers.any(axis=0)):
+                column_movers = mover_rows[movers[:, k]]
+                column_movers = column_movers[np.argsort(usage[column_movers], kind='stable')]
+                available = np.flatnonzero(partner_value[:, k] >= 0)
+                available = available[np.lexsort((-usage[partner_rows[available]], -partner_value[available, k]))]
+
+                position = 0
+                for i in column_movers:
+                    if i in used_students:
+                        continue
+                    cell_changes = [(i, t1, True, True), (i, t2[k], False, True)]
+                    while position < len(available) and partner_rows[available[position]] in used_students:
+                        position += 1
+                    if position < len(available):
+                        j = partner_rows[available[position]]
+                        value = 1 + partner_value[available[position], k]
+                        keep = bool(keep_value[available[position], k] >= 0)
+                        moves.append((value, [], cell_changes + [(j, t1, False, keep), (j, t2[k], True, True)]))
+                        used_students.add(j)
+                    elif num_free > 0:
+                        moves.append((1, [(t1, 1), (t2[k], -1)], cell_changes))
+                        num_free -= 1
+                    else:
+                        break
+                    used_students.add(i)
+        return moves
+
+    @staticmethod
+    def most_used(students, usage):
+        return students[np.argsort(-usage[students], kind='stable')]
+
+    @staticmethod
+    def simulate(b0, r, d, delta_t, Y, U):
+        """Battery levels at slots 0..T of the schedule (Y, U)."""
+        B = np.empty((len(b0), Y.shape[1] + 1))
+        B[:, 0] = b0
+        B[:, 1:] = b0[:, None] + np.cumsum(((r + d) * delta_t)[:, None] * Y - (d * delta_t)[:, None] * U, axis=1)
+        return B
+
+    @staticmethod
+    def suffix_extremes(B):
+        """Minimum and maximum battery over slots t+1..T for every slot t."""
+        reversed_B = B[:, :0:-1]
+        suffix_min = np.minimum.accumulate(reversed_B, axis=1)[:, ::-1]
+        suffix_max = np.maximum.accumulate(reversed_B, axis=1)[:, ::-1]
+        return suffix_min, suffix_max
@@ -0,0 +1,218 @@
+import math
+import numpy as np
+import time
+from typing import Dict, Iterable, Optional
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Entities.student import Student
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
+
+class OnlineHeuristicAllocator:
+    """Stateful, slot-by-slot version of the heuristic for a live room.
+
+    Each step() decides who gets a socket for the next delta_t from the current battery levels
+    only: students that would run flat are served first (fewest used slots, lowest forecast,
+    lowest r - d), then leftover sockets go to the lowest forecasts that still fit. Students are
+    identified by non-negative integer ids. Battery levels that are not observed are predicted from
+    the previous decision, exactly as the offline heuristic does, so a step costs O(N) array work
+    (a partition, not a sort) and nothing proportional to the elapsed horizon.
+    """
+
+    def __init__(self, num_sockets: int, delta_t: float, capacity: int = 1024) -> None:
+        self.num_sockets = num_sockets
+        self.delta_t = delta_t
+        self.heuristic = VectorizedHeuristicOptimization()
+
+        self.num_rows = 0  # Rows in use, including departed students until the next compaction
+        self.num_active = 0
+        self.slot_of_id = np.full(capacity, -1, dtype=np.int64)
+        self.allocate_rows(capacity)
+
+    def allocate_rows(self, capacity: int) -> None:
+        def grow(array, fill):
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[:self.num_rows] = array[:self.num_rows]
+            return grown
+
+        if self.num_rows == 0:
+            self.ids = np.empty(capacity, dtype=np.int64)
+            self.r = np.zeros(capacity)
+            self.d = np.zeros(capacity)
+            self.battery_levels = np.zeros(capacity)
+            self.usage = np.zeros(capacity, dtype=np.int64)
+            self.charging = np.zeros(capacity, dtype=bool)
+            self.in_use = np.zeros(capacity, dtype=bool)
+            self.active = np.zeros(capacity, dtype=bool)
+        else:
+            self.ids = grow(self.ids, 0)
+            self.r = grow(self.r, 0)
+            self.d = grow(self.d, 0)
+            self.battery_levels = grow(self.battery_levels, 0)
+            self.usage = grow(self.usage, 0)
+            self.charging = grow(self.charging, False)
+            self.in_use = grow(self.in_use, False)
+            self.active = grow(self.active, False)
+
+    def rows(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = self.slot_of_id[ids] if ids.size and ids.max() < len(self.slot_of_id) else np.full(ids.shape, -1)
+        if np.any(rows < 0):
+            raise KeyError(f"Unknown student ids: {ids[rows < 0].tolist()}")
+        return rows
+
+    def add_students(self, ids, recharge_rates, discharge_rates, battery_levels) -> None:
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size == 0:
+            return
+        if ids.max() >= len(self.slot_of_id):
+            slot_of_id = np.full(max(2 * len(self.slot_of_id), int(ids.max()) + 1), -1, dtype=np.int64)
+            slot_of_id[:len(self.slot_of_id)] = self.slot_of_id
+            self.slot_of_id = slot_of_id
+        if np.any(self.slot_of_id[ids] >= 0) or len(np.unique(ids)) != len(ids):
+            raise ValueError("Student ids must be unique")
+
+        if self.num_rows + len(ids) > len(self.r):
+            self.allocate_rows(max(2 * len(self.r), self.num_rows + len(ids)))
+
+        rows = slice(self.num_rows, self.num_rows + len(ids))
+        self.ids[rows] = ids
+        self.r[rows] = recharge_rates
+        self.d[rows] = discharge_rates
+        self.battery_levels[rows] = battery_levels
+        self.usage[rows] = 0
+        self.charging[rows] = False
+        self.in_use[rows] = False
+        self.active[rows] = True
+        self.slot_of_id[ids] = np.arange(rows.start, rows.stop)
+        self.num_rows = rows.stop
+        self.num_active += len(ids)
+
+    def remove_students(self, ids) -> None:
+        rows = self.rows(ids)
+        self.active[rows] = False
+        self.charging[rows] = False
+        self.in_use[rows] = False
+        self.slot_of_id[self.ids[rows]] = -1
+        self.num_active -= len(rows)
+
+        # Drop departed rows once they make up half of the table, keeping arrival order for tie-breaking
+        if self.num_rows - self.num_active > max(self.num_active, 64):
+            self.compact()
+
+    def compact(self) -> None:
+        keep = np.flatnonzero(self.active[:self.num_rows])
+        for array in (self.ids, self.r, self.d, self.battery_levels, self.usage, self.charging, self.in_use, self.active):
+            array[:len(keep)] = array[keep]
+        self.active[len(keep):self.num_rows] = False
+        self.num_rows = len(keep)
+        self.slot_of_id[self.ids[:self.num_rows]] = np.arange(self.num_rows)
+
+    def observe(self, ids, battery_levels) -> None:
+        """Overwrite the predicted battery levels of some students with measured ones."""
+        self.battery_levels[self.rows(ids)] = battery_levels
+
+    def step(self, observed_ids=None, observed_levels=None, arrivals: Optional[Dict[int, Student]] = None,
+             departures: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Advance one slot and return the ids of the students that get a socket for it.
+
+        arrivals maps new ids to Students (their initial_battery is the current level), and
+        observed_ids/observed_levels replace the predicted levels of those students.
+        """
+        n = self.num_rows
+        delta_t = self.delta_t
+
+        # Battery levels after the previous slot, as calculate_current_battery_levels computes them
+        charging = self.charging[:n]
+        in_use = self.in_use[:n]
+        self.battery_levels[:n] += (charging * self.r[:n] * delta_t + (charging & in_use) * self.d[:n] * delta_t
+                                    - in_use * self.d[:n] * delta_t)
+
+        if departures is not None:
+            self.remove_students(list(departures))
+        if arrivals:
+            self.add_students(list(arrivals), [student.recharge_rate for student in arrivals.values()],
+                              [student.discharge_rate for student in arrivals.values()],
+                              [student.initial_battery for student in arrivals.values()])
+        if observed_ids is not None:
+            self.observe(observed_ids, observed_levels)
+
+        n = self.num_rows
+        r = self.r[:n]
+        d = self.d[:n]
+        active = self.active[:n]
+        forecasted_battery_levels = self.battery_levels[:n] - d * delta_t
+
+        # Students that would run flat come first, like allocate_sockets
+        needing_sockets = active & (forecasted_battery_levels < 0)
+        allocated = self.heuristic.select_first(np.flatnonzero(needing_sockets), self.num_sockets,
+                                                self.usage[:n], forecasted_battery_levels, r - d)
+        charging = np.zeros(n, dtype=bool)
+        charging[allocated] = True
+
+        # Leftover sockets go to the lowest forecasts that still fit, like distribute_remaining_sockets
+        remaining_sockets = self.num_sockets - len(allocated)
+        if remaining_sockets > 0:
+            topped_up = self.heuristic.select_first(np.flatnonzero(active & ~charging), remaining_sockets, forecasted_battery_levels)
+            fits = forecasted_battery_levels[topped_up] + r[topped_up] * delta_t + d[topped_up] * delta_t <= 100
+            charging[topped_up[fits]] = True
+
+        self.charging[:n] = charging
+        self.in_use[:n] = active & (~needing_sockets | charging)
+        self.usage[:n] += self.in_use[:n]
+        return self.ids[:n][charging]
+
+    @property
+    def student_ids(self) -> np.ndarray:
+        return self.ids[:self.num_rows][self.active[:self.num_rows]]
+
+    @property
+    def in_use_ids(self) -> np.ndarray:
+        """Students that can keep working during the last decided slot."""
+        return self.ids[:self.num_rows][self.in_use[:self.num_rows]]
+
+class OnlineHeuristicOptimization:
+    """Replays an instance through OnlineHeuristicAllocator, one step per slot, without observations.
+
+    With nobody arriving or leaving this reproduces HeuristicOptimization, so it checks the online
+    path against the offline one and reports its per-step decision time.
+    """
+
+    def __init__(self):
+        self.name = "Online Heuristic Optimization"
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> OptimizationResult:
+        num_students = optimization_instance.num_students
+        delta_t = optimization_instance.delta_t
+        num_time_slots = math.ceil(optimization_instance.total_time / delta_t)
+
+        allocator = OnlineHeuristicAllocator(optimization_instance.num_sockets, delta_t, capacity=max(num_students, 1))
+        allocator.add_students(np.arange(num_students), optimization_instance.recharge_rates,
+                               optimization_instance.discharge_rates, optimization_instance.initial_batteries)
+
+        B_matrix = np.zeros((num_students, num_time_slots))
+        Y_matrix = np.zeros((num_students, num_time_slots))
+        U_matrix = np.zeros((num_students, num_time_slots))
+
+        start_time = time.time()
+        for t in range(num_time_slots):
+            Y_matrix[allocator.step(), t] = 1
+            B_matrix[:, t] = allocator.battery_levels[:num_students]
+            U_matrix[:, t] = allocator.in_use[:num_students]
+        end_time = time.time()
+
+        A = (np.sum(U_matrix) / (num_time_slots * num_students))
+        Z = np.min(np.sum(U_matrix, axis=1))
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=( A+ Z),
+            min_usage_time=Z,
+            A=A,
+            U=U_matrix,
+            Y=Y_matrix,
+            B=B_matrix,
+            optimization_time=end_time - start_time,
+            model_build_time=0,
+            average_step_time=(end_time - start_time) / num_time_slots
+        )
+
+        return result
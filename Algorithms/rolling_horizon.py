@@ -0,0 +1,165 @@
+import math
+import numpy as np
+from typing import Optional
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Algorithms.gurobi_algorithm import GurobiOptimization
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
+
+INT_FEAS_TOL = 1e-5  # Gurobi's default IntFeasTol, how far from 0 or 1 a binary in a window's solution can be
+
+class RollingHorizonOptimization:
+    """Solves the MILP over overlapping windows of window_slots slots instead of the whole horizon.
+
+    Each window starts from the battery levels the committed schedule leads to and adds every
+    student's committed usage to the fairness term Z, so Z still measures usage since slot 0. Only
+    the first commit_slots slots of a window are kept before the window moves on. Battery left at the
+    end of a window is rewarded, at less than one slot of Z in total, so a window doesn't drain the
+    batteries the next one needs. The window solver is GurobiOptimization by default; any solver whose optimize_allocation accepts prior_usage works
+    (e.g. HighsOptimization). Gurobi windows are warm-started with the previous window's uncommitted plan.
+
+    The windows only see part of the horizon, so the stitched schedule can score below the heuristic.
+    With heuristic_floor, the heuristic's schedule is returned instead in that case (kept_heuristic).
+    """
+
+    def __init__(self, window_slots: int = 16, commit_slots: int = 8, window_solver=None, window_time_limit: Optional[float] = None,
+                 battery_tolerance: Optional[float] = None, heuristic_floor: bool = True):
+        if not 0 < commit_slots <= window_slots:
+            raise ValueError("commit_slots must be between 1 and window_slots")
+        self.name = "Rolling Horizon Optimization"
+        self.window_slots = window_slots
+        self.commit_slots = commit_slots
+        self.window_solver = window_solver if window_solver is not None else GurobiOptimization()
+        self.window_time_limit = window_time_limit  # None splits the instance time limit evenly between the windows
+        self.heuristic_floor = heuristic_floor  # Never return a schedule that scores below the heuristic's
+        # Round-off allowed outside [0, 100] when the committed slots are replayed, None derives it per student from INT_FEAS_TOL
+        self.battery_tolerance = battery_tolerance
+
+    def shifted_plan(self, previous_result: OptimizationResult, num_time_slots: int, r, d, b0, delta_t):
+        """The previous window's plan after the committed slots, padded with idle slots and with B recomputed from b0."""
+        Y = np.zeros((len(b0), num_time_slots))
+        U = np.zeros((len(b0), num_time_slots))
+        carried_slots = min(previous_result.Y.shape[1] - self.commit_slots, num_time_slots)
+        Y[:, :carried_slots] = previous_result.Y[:, self.commit_slots:self.commit_slots + carried_slots]
+        U[:, :carried_slots] = previous_result.U[:, self.commit_slots:self.commit_slots + carried_slots]
+
+        B = np.empty((len(b0), num_time_slots + 1))
+        B[:, 0] = b0
+        B[:, 1:] = b0[:, None] + np.cumsum(Y * ((r + d) * delta_t)[:, None] - U * (d * delta_t)[:, None], axis=1)
+        return {'Y': Y, 'U': U, 'B': B}
+
+    def replay_tolerance(self, r, d, delta_t) -> np.ndarray:
+        """Per student, how far replaying rounded binaries can drift from a window's battery levels.
+
+        Every binary may be off by INT_FEAS_TOL, which moves the battery by up to that times (r + d) * delta_t
+        per slot, over at most window_slots slots. 1e-6 covers the feasibility tolerance on B itself.
+        """
+        if self.battery_tolerance is not None:
+            return np.full(len(r), self.battery_tolerance)
+        return INT_FEAS_TOL * (r + d) * delta_t * self.window_slots + 1e-6
+
+    def check_battery(self, battery: np.ndarray, t: int, tolerance: np.ndarray) -> None:
+        """Raise if the committed schedule takes a battery outside [0, 100] in slot t, beyond its tolerance.
+
+        That would mean the committed slots differ from the plan the window model found feasible.
+        """
+        violation = np.maximum(-battery, battery - 100) - tolerance
+        student = int(np.argmax(violation))
+        if violation[student] > 0:
+            raise ValueError(f"Committed schedule takes student {student} to battery level {battery[student]:.6g} after slot {t}, "
+                             f"outside [0, 100] by more than {tolerance[student]:.3g}")
+
+    def optimize_allocation(self, optimization_instance: OptimizationInstance) -> OptimizationResult:
+        num_students = optimization_instance.num_students
+        delta_t = optimization_instance.delta_t
+        num_time_slots = math.ceil(optimization_instance.total_time / delta_t)
+
+        r = optimization_instance.recharge_rates
+        d = optimization_instance.discharge_rates
+
+        num_windows = max(1, math.ceil(max(num_time_slots - self.window_slots, 0) / self.commit_slots) + 1)
+        if self.window_time_limit is not None:
+            window_time_limit = self.window_time_limit
+        elif optimization_instance.time_limit > 0:
+            window_time_limit = optimization_instance.time_limit / num_windows
+        else:
+            window_time_limit = 0
+
+        tolerance = self.replay_tolerance(r, d, delta_t)
+        B_matrix = np.zeros((num_students, num_time_slots + 1))
+        B_matrix[:, 0] = optimization_instance.initial_batteries
+        Y_matrix = np.zeros((num_students, num_time_slots))
+        U_matrix = np.zeros((num_students, num_time_slots))
+        usage = np.zeros(num_students)
+
+        model_build_time = 0
+        optimization_time = 0
+        window_result = None
+        stopped_early = None
+        start = 0
+        while start < num_time_slots:
+            window_length = min(self.window_slots, num_time_slots - start)
+            # All end batteries together (at most 100 each) are worth less than one slot of usage, 1 / (N * T) of
+            # the window's score, so they only break ties and a window never gives up usage for battery
+            terminal_battery_weight = 1 / (2 * 100 * num_students * num_students * window_length) if start + window_length < num_time_slots else 0
+            window_instance = OptimizationInstance.from_arrays(r, d, B_matrix[:, start], optimization_instance.num_sockets,
+                                                              window_length * delta_t, delta_t, window_time_limit)
+
+            if isinstance(self.window_solver, GurobiOptimization):
+                initial_guesses = None if window_result is None else self.shifted_plan(window_result, window_length, r, d, B_matrix[:, start], delta_t)
+                window_result = self.window_solver.optimize_allocation(window_instance, initial_guesses, prior_usage=usage,
+                                                                       terminal_battery_weight=terminal_battery_weight)
+            else:
+                window_result = self.window_solver.optimize_allocation(window_instance, prior_usage=usage,
+                                                                       terminal_battery_weight=terminal_battery_weight)
+
+            model_build_time += window_result.model_build_time
+            optimization_time += window_result.optimization_time
+            if window_result.status != 'optimal':
+                return OptimizationResult(status='not_optimal', model_build_time=model_build_time, optimization_time=optimization_time)
+            stopped_early = stopped_early or window_result.get('stopped_early')
+
+            # The last window is committed in full
+            committed = window_length if start + window_length == num_time_slots else self.commit_slots
+            end = start + committed
+            Y_matrix[:, start:end] = window_result.Y[:, :committed]
+            U_matrix[:, start:end] = window_result.U[:, :committed]
+            usage += window_result.U[:, :committed].sum(axis=1)
+
+            # Batteries follow from the rounded schedule, so solver tolerances don't build up from window to window
+            for t in range(start, end):
+                battery = B_matrix[:, t] + Y_matrix[:, t] * (r + d) * delta_t - U_matrix[:, t] * d * delta_t
+                self.check_battery(battery, t, tolerance)
+                # Only round-off within the tolerance is clipped, so the next window starts inside [0, 100]
+                B_matrix[:, t + 1] = np.clip(battery, 0, 100)
+            start = end
+
+        kept_heuristic = False
+        if self.heuristic_floor:
+            heuristic_result = VectorizedHeuristicOptimization().optimize_allocation(optimization_instance)
+            optimization_time += heuristic_result.optimization_time
+            if heuristic_result.fair_maximized_usage_score > np.min(np.sum(U_matrix, axis=1)) + np.sum(U_matrix) / (num_time_slots * num_students):
+                kept_heuristic = True
+                Y_matrix = heuristic_result.Y.astype(float)
+                U_matrix = heuristic_result.U.astype(float)
+                B_matrix[:, 1:] = B_matrix[:, :1] + np.cumsum(Y_matrix * ((r + d) * delta_t)[:, None] - U_matrix * (d * delta_t)[:, None], axis=1)
+
+        A = (np.sum(U_matrix) / (num_time_slots * num_students))
+        Z = np.min(np.sum(U_matrix, axis=1))
+        result = OptimizationResult(
+            status='optimal',
+            fair_maximized_usage_score=( A+ Z),
+            min_usage_time=Z,
+            A=A,
+            U=U_matrix,
+            Y=Y_matrix,
+            B=B_matrix,
+            model_build_time=model_build_time,
+            optimization_time=optimization_time,
+            num_windows=num_windows,
+            kept_heuristic=kept_heuristic
+        )
+        if stopped_early:
+            result['stopped_early'] = stopped_early
+
+        return result
@@ -0,0 +1,65 @@
+import math
+from typing import List, Optional, Tuple
+
+TRACE_COLUMNS = ('time', 'incumbent', 'bound', 'gap', 'nodes')
+
+class SolverTraceRecorder:
+    """Gurobi callback recording (time, incumbent, bound, gap, nodes) during a MIP solve.
+
+    A point is taken at every new incumbent and, while the search runs, at most once per interval
+    seconds. Missing incumbents are recorded as nan. The callback only reads a few cbGet values, so
+    it stays well below 1% of the solve time.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        from gurobipy import GRB  # Imported here so traces can be handled without Gurobi
+        self.GRB = GRB
+        self.interval = interval
+        self.points: List[Tuple[float, float, float, float, float]] = []
+        self.next_sample_time = 0.0
+
+    def __call__(self, model, where) -> None:
+        GRB = self.GRB
+        if where == GRB.Callback.MIPSOL:
+            # MIPSOL_OBJBST is still the incumbent before this solution, and the model maximizes
+            incumbent = max(model.cbGet(GRB.Callback.MIPSOL_OBJ), model.cbGet(GRB.Callback.MIPSOL_OBJBST))
+            self.record(model.cbGet(GRB.Callback.RUNTIME), incumbent,
+                        model.cbGet(GRB.Callback.MIPSOL_OBJBND), model.cbGet(GRB.Callback.MIPSOL_NODCNT))
+        elif where == GRB.Callback.MIP:
+            runtime = model.cbGet(GRB.Callback.RUNTIME)
+            if runtime >= self.next_sample_time:
+                self.record(runtime, model.cbGet(GRB.Callback.MIP_OBJBST), model.cbGet(GRB.Callback.MIP_OBJBND),
+                            model.cbGet(GRB.Callback.MIP_NODCNT))
+
+    def record(self, runtime: float, incumbent: float, bound: float, nodes: float) -> None:
+        if abs(incumbent) >= self.GRB.INFINITY:
+            incumbent = math.nan
+        if abs(bound) >= self.GRB.INFINITY:
+            bound = math.nan
+        # Same definition as Gurobi's MIPGap
+        gap = abs(bound - incumbent) / abs(incumbent) if incumbent else math.nan
+        self.points.append((runtime, incumbent, bound, gap, nodes))
+        self.next_sample_time = runtime + self.interval
+
+    def finish(self, model) -> List[Tuple[float, float, float, float, float]]:
+        """Append the final state of the solve and return the trace."""
+        if model.SolCount > 0:
+            self.record(model.Runtime, model.ObjVal, model.ObjBound, model.NodeCount)
+        return self.points
+
+def chain_callbacks(*callbacks):
+    """Combine Gurobi callbacks into one, skipping None. Returns None if there is nothing to call."""
+    callbacks = [callback for callback in callbacks if callback is not None]
+    if not callbacks:
+        return None
+    if len(callbacks) == 1:
+        return callbacks[0]
+
+    def callback(model, where):
+        for each in callbacks:
+            each(model, where)
+    return callback
+
+def trace_rows(trace: Optional[List[Tuple]], *key) -> List[List]:
+    """Long-format rows (key..., point, time, incumbent, bound, gap, nodes) for CSV export."""
+    return [[*key, point, *values] for point, values in enumerate(trace or [])]
@@ -1,14 +1,86 @@
-from typing import List
+from typing import Sequence, Union
+import numpy as np
 from Entities.student import Student
 
+class StudentViews(Sequence):
+    """Read-only sequence of Student views over an instance's (3, N) student block."""
+
+    __slots__ = ('student_data',)
+
+    def __init__(self, student_data: np.ndarray) -> None:
+        self.student_data: np.ndarray = student_data
+
+    def __len__(self) -> int:
+        return self.student_data.shape[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return StudentViews(self.student_data[:, index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Student.view(self.student_data, index)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
 class OptimizationInstance:
-    def __init__(self, students: List[Student], num_sockets: int, total_time: float, delta_t: float, time_limit: int) -> None:
-        self.students: List[Student] = students
+    """Problem instance stored as a struct of arrays.
+
+    Recharge rates, discharge rates and initial batteries are the rows of one (3, N) float block,
+    so recharge_rates, discharge_rates and initial_batteries are contiguous arrays the algorithms
+    use directly. `students` gives Student views of the same memory.
+    """
+
+    def __init__(self, students: Union[Sequence[Student], StudentViews], num_sockets: int, total_time: float, delta_t: float, time_limit: int) -> None:
+        if isinstance(students, StudentViews):
+            student_data = students.student_data
+        else:
+            student_data = np.array([[s.recharge_rate for s in students],
+                                     [s.discharge_rate for s in students],
+                                     [s.initial_battery for s in students]], dtype=float).reshape(3, len(students))
+        self.student_data: np.ndarray = student_data
         self.num_sockets: int = num_sockets
         self.total_time: float = total_time
         self.delta_t: float = delta_t
         self.time_limit: int = time_limit
 
+    @classmethod
+    def from_arrays(cls, recharge_rates: np.ndarray, discharge_rates: np.ndarray, initial_batteries: np.ndarray,
+                    num_sockets: int, total_time: float, delta_t: float, time_limit: int) -> 'OptimizationInstance':
+        student_data = np.array([recharge_rates, discharge_rates, initial_batteries], dtype=float)
+        return cls(StudentViews(student_data), num_sockets, total_time, delta_t, time_limit)
+
+    @property
+    def students(self) -> StudentViews:
+        return StudentViews(self.student_data)
+
+    @property
+    def num_students(self) -> int:
+        return self.student_data.shape[1]
+
+    @property
+    def recharge_rates(self) -> np.ndarray:
+        return self.student_data[0]
+
+    @property
+    def discharge_rates(self) -> np.ndarray:
+        return self.student_data[1]
+
+    @property
+    def initial_batteries(self) -> np.ndarray:
+        return self.student_data[2]
+
+    def sub_instance(self, students: slice, num_sockets: int = None) -> 'OptimizationInstance':
+        """Instance over a slice of the students. Slices share memory with this instance."""
+        num_sockets = self.num_sockets if num_sockets is None else num_sockets
+        return OptimizationInstance(StudentViews(self.student_data[:, students]), num_sockets, self.total_time, self.delta_t, self.time_limit)
+
+    def with_num_sockets(self, num_sockets: int) -> 'OptimizationInstance':
+        """Same students (sharing memory) with a different number of sockets."""
+        return self.sub_instance(slice(None), num_sockets)
+
     def __repr__(self) -> str:
         return (f"OptimizationInstance(num_sockets={self.num_sockets}, total_time={self.total_time}, "
                 f"delta_t={self.delta_t}, students={self.students}, time_limit={self.time_limit})")
@@ -0,0 +1,79 @@
+from typing import Any, Dict, Optional
+import numpy as np
+from Entities.schedule import Schedule
+
+class OptimizationResult:
+    """Outcome of one optimize_allocation call.
+
+    U and Y are kept bit-packed in a Schedule (`schedule`), given either as one or as U and Y arrays,
+    and read back as int8 (students x slots) arrays. B is a float array. Dict-style access
+    (result['U'], result.get('A')) still works, and keys without a slot are kept in `extras`.
+    """
+
+    __slots__ = ('status', 'fair_maximized_usage_score', 'min_usage_time', 'A', 'schedule', 'B',
+                 'model_build_time', 'optimization_time', 'extras')
+    UNPACKED = ('U', 'Y')  # Keys read from and written to the schedule
+
+    def __init__(self, status: str, fair_maximized_usage_score: Optional[float] = None, min_usage_time: Optional[float] = None,
+                 A: Optional[float] = None, U=None, Y=None, B=None, model_build_time: float = 0, optimization_time: float = 0,
+                 schedule: Optional[Schedule] = None, **extras: Any) -> None:
+        self.status: str = status
+        self.fair_maximized_usage_score: Optional[float] = fair_maximized_usage_score
+        self.min_usage_time: Optional[float] = min_usage_time
+        self.A: Optional[float] = A
+        if schedule is None and U is not None:
+            schedule = Schedule.from_arrays(U, Y)
+        self.schedule: Optional[Schedule] = schedule
+        self.B: Optional[np.ndarray] = None if B is None else np.asarray(B, dtype=float)
+        self.model_build_time: float = model_build_time
+        self.optimization_time: float = optimization_time
+        self.extras: Dict[str, Any] = extras
+
+    @property
+    def U(self) -> Optional[np.ndarray]:
+        return None if self.schedule is None else self.schedule.U
+
+    @U.setter
+    def U(self, U) -> None:
+        self.schedule = Schedule.from_arrays(U, np.zeros_like(U) if self.schedule is None else self.schedule.Y)
+
+    @property
+    def Y(self) -> Optional[np.ndarray]:
+        return None if self.schedule is None else self.schedule.Y
+
+    @Y.setter
+    def Y(self, Y) -> None:
+        self.schedule = Schedule.from_arrays(np.zeros_like(Y) if self.schedule is None else self.schedule.U, Y)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.extras:
+            return self.extras[key]
+        if key == 'extras' or key not in self.__slots__ and key not in self.UNPACKED:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == 'extras' or key not in self.__slots__ and key not in self.UNPACKED:
+            self.extras[key] = value
+        else:
+            setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys() or key in self.UNPACKED
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key in self.__slots__ if key != 'extras'] + list(self.extras)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self) -> str:
+        shape = None if self.schedule is None else self.schedule.shape
+        return (f"OptimizationResult(status={self.status}, fair_maximized_usage_score={self.fair_maximized_usage_score}, "
+                f"min_usage_time={self.min_usage_time}, A={self.A}, schedule_shape={shape})")
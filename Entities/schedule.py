@@ -0,0 +1,104 @@
+from typing import Dict, Optional
+import numpy as np
+
+# Set bits of every byte value, for NumPy versions without np.bitwise_count
+POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits)
+    return POPCOUNT_TABLE[bits]
+
+class Schedule:
+    """U and Y of a schedule as bit-packed rows, slot t of a student in bit t % 8 of byte t // 8 of its row.
+
+    A matrix takes N * ceil(T / 8) bytes instead of N * T as int8 or 8 * N * T as float64. Usage totals
+    and socket counts are computed on the packed bytes; U and Y unpack to int8 arrays when read.
+    """
+
+    __slots__ = ('num_students', 'num_time_slots', 'U_bits', 'Y_bits')
+
+    def __init__(self, num_students: int, num_time_slots: int, U_bits: Optional[np.ndarray] = None,
+                 Y_bits: Optional[np.ndarray] = None) -> None:
+        self.num_students: int = int(num_students)
+        self.num_time_slots: int = int(num_time_slots)
+        shape = (self.num_students, (self.num_time_slots + 7) // 8)
+        self.U_bits: np.ndarray = np.zeros(shape, dtype=np.uint8) if U_bits is None else np.asarray(U_bits, dtype=np.uint8).reshape(shape)
+        self.Y_bits: np.ndarray = np.zeros(shape, dtype=np.uint8) if Y_bits is None else np.asarray(Y_bits, dtype=np.uint8).reshape(shape)
+
+    @classmethod
+    def from_arrays(cls, U, Y) -> 'Schedule':
+        U = np.asarray(U)
+        num_students, num_time_slots = U.shape
+        return cls(num_students, num_time_slots, cls.pack(U), cls.pack(Y))
+
+    @staticmethod
+    def pack(matrix) -> np.ndarray:
+        return np.packbits(np.asarray(matrix) != 0, axis=1, bitorder='little')
+
+    def unpack(self, bits: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bits, axis=1, count=self.num_time_slots, bitorder='little').view(np.int8)
+
+    @property
+    def U(self) -> np.ndarray:
+        return self.unpack(self.U_bits)
+
+    @property
+    def Y(self) -> np.ndarray:
+        return self.unpack(self.Y_bits)
+
+    @property
+    def shape(self):
+        return (self.num_students, self.num_time_slots)
+
+    @property
+    def nbytes(self) -> int:
+        return self.U_bits.nbytes + self.Y_bits.nbytes
+
+    def set_slot(self, t: int, U_column, Y_column) -> None:
+        """Store the decisions of every student for slot t."""
+        byte, bit = divmod(t, 8)
+        mask = np.uint8(~(1 << bit) & 0xFF)
+        for bits, column in ((self.U_bits, U_column), (self.Y_bits, Y_column)):
+            bits[:, byte] = (bits[:, byte] & mask) | ((np.asarray(column) != 0).astype(np.uint8) << bit)
+
+    def slot(self, t: int):
+        """U and Y of every student in slot t, as boolean columns."""
+        byte, bit = divmod(t, 8)
+        return (self.U_bits[:, byte] >> bit) & 1 == 1, (self.Y_bits[:, byte] >> bit) & 1 == 1
+
+    def usage(self) -> np.ndarray:
+        """Slots each student is in use, whose minimum is Z."""
+        return popcount(self.U_bits).sum(axis=1, dtype=np.int64)
+
+    def charging_slots(self) -> np.ndarray:
+        """Slots each student is charging."""
+        return popcount(self.Y_bits).sum(axis=1, dtype=np.int64)
+
+    def socket_counts(self) -> np.ndarray:
+        """Students charging in each slot, one pass over the packed bytes per bit position."""
+        counts = np.empty(self.num_time_slots, dtype=np.int64)
+        for bit in range(8):
+            slots = counts[bit::8]
+            slots[:] = ((self.Y_bits >> bit) & 1).sum(axis=0, dtype=np.int64)[:len(slots)]
+        return counts
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The packed schedule as named arrays, e.g. for np.savez."""
+        return {'U_bits': self.U_bits, 'Y_bits': self.Y_bits, 'schedule_shape': np.array(self.shape)}
+
+    @classmethod
+    def from_npz(cls, entry) -> 'Schedule':
+        num_students, num_time_slots = entry['schedule_shape']
+        return cls(num_students, num_time_slots, entry['U_bits'], entry['Y_bits'])
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path: str) -> 'Schedule':
+        with np.load(path) as entry:
+            return cls.from_npz(entry)
+
+    def __repr__(self) -> str:
+        return f"Schedule(num_students={self.num_students}, num_time_slots={self.num_time_slots})"
@@ -1,11 +1,49 @@
-from typing import List
+import numpy as np
 
 class Student:
+    """One student, read from and written to a column of a (3, N) rate/battery block.
+
+    Students created directly own a one-column block. Students handed out by an
+    OptimizationInstance are views into the instance's arrays and cost two references each.
+    """
+
+    __slots__ = ('_student_data', '_index')
+
     def __init__(self, recharge_rate: float, discharge_rate: float, initial_battery: float) -> None:
-        self.recharge_rate: float = recharge_rate
-        self.discharge_rate: float = discharge_rate
-        self.initial_battery: float = initial_battery
+        self._student_data: np.ndarray = np.array([[recharge_rate], [discharge_rate], [initial_battery]], dtype=float)
+        self._index: int = 0
+
+    @classmethod
+    def view(cls, student_data: np.ndarray, index: int) -> 'Student':
+        student = cls.__new__(cls)
+        student._student_data = student_data
+        student._index = index
+        return student
+
+    @property
+    def recharge_rate(self) -> float:
+        return self._student_data[0, self._index]
+
+    @recharge_rate.setter
+    def recharge_rate(self, value: float) -> None:
+        self._student_data[0, self._index] = value
+
+    @property
+    def discharge_rate(self) -> float:
+        return self._student_data[1, self._index]
+
+    @discharge_rate.setter
+    def discharge_rate(self, value: float) -> None:
+        self._student_data[1, self._index] = value
+
+    @property
+    def initial_battery(self) -> float:
+        return self._student_data[2, self._index]
+
+    @initial_battery.setter
+    def initial_battery(self, value: float) -> None:
+        self._student_data[2, self._index] = value
 
     def __repr__(self) -> str:
         return (f"Student(recharge_rate={self.recharge_rate}, discharge_rate={self.discharge_rate}, "
-                f"initial_battery={self.initial_battery})")
\ No newline at end of file
+                f"initial_battery={self.initial_battery})")
@@ -0,0 +1,79 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from matplotlib.figure import Figure
+
+# Colors of the off, in use on battery and charging states, as in the original heatmaps
+STATE_COLORS = np.array([[0x8B, 0x00, 0x00], [0xFF, 0xD7, 0x00], [0x00, 0x64, 0x00]], dtype=np.float32) / 255
+MIN_SHADE = 0.45  # Brightness of an empty battery, a full one is drawn at the full state color
+MAX_GRID_ROWS = 200  # Beyond this the cell borders would cover the cells
+
+def allocation_states(U: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    """0 for off, 1 for in use on battery and 2 for charging, per student and slot."""
+    return np.where(Y == 1, 2, U == 1).astype(np.int8)
+
+def allocation_image(B: np.ndarray, U: np.ndarray, Y: np.ndarray, max_rows: Optional[int] = 2000,
+                     chunk_rows: int = 65536) -> np.ndarray:
+    """RGB image of a schedule: one row per student, one column per slot, the state color shaded by the battery level.
+
+    With more than max_rows students, consecutive students are averaged into max_rows image rows,
+    which is what the figure can show anyway. The students are processed chunk_rows at a time, so
+    the memory used stays proportional to the image rather than to N x T.
+    """
+    num_students, num_time_slots = U.shape
+    rows_per_pixel = 1 if max_rows is None else max(1, math.ceil(num_students / max_rows))
+    num_rows = math.ceil(num_students / rows_per_pixel)
+    chunk_rows = max(rows_per_pixel, chunk_rows // rows_per_pixel * rows_per_pixel)
+    image = np.empty((num_rows, num_time_slots, 3), dtype=np.float32)
+
+    for start in range(0, num_students, chunk_rows):
+        stop = min(start + chunk_rows, num_students)
+        shade = MIN_SHADE + (1 - MIN_SHADE) * np.clip(B[start:stop, :num_time_slots], 0, 100).astype(np.float32) / 100
+        colors = STATE_COLORS[allocation_states(U[start:stop], Y[start:stop])] * shade[..., None]
+        if rows_per_pixel > 1:
+            block_starts = np.arange(0, stop - start, rows_per_pixel)
+            block_sizes = np.diff(np.append(block_starts, stop - start))
+            colors = np.add.reduceat(colors, block_starts, axis=0) / block_sizes[:, None, None]
+        image[start // rows_per_pixel:start // rows_per_pixel + len(colors)] = colors
+    return image
+
+def draw_allocation(ax, B: np.ndarray, U: np.ndarray, Y: np.ndarray, annotate: bool = False, grid: bool = True,
+                    max_rows: Optional[int] = 2000) -> None:
+    """Draw a schedule on ax with a single imshow call.
+
+    Cell borders are two line collections, drawn for up to MAX_GRID_ROWS students. Annotating
+    the battery levels adds one text per cell, so it is only meant for small schedules.
+    """
+    num_students, num_time_slots = U.shape
+    image = allocation_image(B, U, Y, max_rows)
+    ax.imshow(image, aspect='auto', interpolation='nearest', extent=(0, num_time_slots, num_students, 0))
+
+    if grid and num_students <= MAX_GRID_ROWS:
+        ax.hlines(np.arange(num_students + 1), 0, num_time_slots, colors='white', linewidth=.5)
+        ax.vlines(np.arange(num_time_slots + 1), 0, num_students, colors='white', linewidth=.5)
+    if annotate:
+        for i, t in np.ndindex(U.shape):
+            ax.text(t + 0.5, i + 0.5, f"{B[i, t]:.0f}", ha='center', va='center', fontsize=8)
+
+def render_allocation_figure(path: str, panels: Sequence[Dict], figsize: Tuple[float, float] = (10, 8), dpi: int = 100,
+                             max_rows: Optional[int] = 2000) -> str:
+    """Save one figure with a panel per schedule to path, without pyplot or a display.
+
+    Each panel is a dict with the B, U and Y arrays and optionally a title.
+    """
+    fig = Figure(figsize=figsize)
+    axs = fig.subplots(len(panels), 1, squeeze=False, gridspec_kw={'hspace': 0.5})[:, 0]
+    for ax, panel in zip(axs, panels):
+        draw_allocation(ax, np.asarray(panel['B']), np.asarray(panel['U']), np.asarray(panel['Y']), max_rows=max_rows)
+        ax.set_title(panel.get('title', ''), fontsize=14, pad=10)
+        ax.set_xticks([])
+        ax.set_yticks([])
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+def render_allocation_figures(figures: Sequence[Tuple[str, Sequence[Dict]]], max_workers: Optional[int] = None, **options) -> List[str]:
+    """Render many (path, panels) figures on a process pool and return their paths."""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(render_allocation_figure, path, panels, **options) for path, panels in figures]
+        return [future.result() for future in futures]
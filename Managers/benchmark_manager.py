@@ -0,0 +1,172 @@
+import importlib
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from Managers.instance_generator import InstanceGenerator, InstanceCorpus
+
+# (name, module, class, largest N it is benchmarked on). Backends are imported when the suite
+# starts, so a missing solver only removes its own cases.
+BENCHMARK_ALGORITHMS = (
+    ('Heuristic', 'Algorithms.heuristic_algorithm', 'HeuristicOptimization', 10000),
+    ('VectorizedHeuristic', 'Algorithms.heuristic_vectorized', 'VectorizedHeuristicOptimization', 100000),
+    ('OnlineHeuristic', 'Algorithms.online_heuristic', 'OnlineHeuristicOptimization', 100000),
+    ('LocalSearch', 'Algorithms.local_search', 'LocalSearchOptimization', 100000),
+    ('AggregatedGurobi', 'Algorithms.aggregated_gurobi', 'AggregatedGurobiOptimization', 100000),
+    ('Gurobi', 'Algorithms.gurobi_algorithm', 'GurobiOptimization', 100),
+    ('HiGHS', 'Algorithms.highs_algorithm', 'HighsOptimization', 100),
+)
+
+TIME_METRICS = ('total_time', 'model_build_time', 'solve_time', 'extraction_time')
+MEMORY_METRICS = ('peak_memory_mb',)
+
+class BenchmarkManager:
+    """Times every available algorithm on a fixed corpus and compares the numbers with a JSON baseline.
+
+    Each case is one (algorithm, N, delta_T) on the corpus instance of a fixed seed. Times are the
+    minimum over the repeats. total_time is the wall clock of optimize_allocation, model_build_time
+    and solve_time are the times the algorithm reports, and extraction_time is what is left, i.e.
+    reading the solution back. peak_memory_mb is the traced Python/NumPy peak of one extra run;
+    memory allocated inside the solver libraries is not included.
+    """
+
+    def __init__(self, corpus_directory: str, Ns: Sequence[int], delta_Ts: Sequence[float], T: int = 16,
+                 socket_ratio: float = 0.25, seed: int = 0, time_limit: int = 10, repeats: int = 3,
+                 measure_memory: bool = True, algorithms=BENCHMARK_ALGORITHMS):
+        self.Ns = list(Ns)
+        self.delta_Ts = list(delta_Ts)
+        self.T = T
+        self.socket_ratio = socket_ratio  # Sockets per student
+        self.seed = seed
+        self.time_limit = time_limit  # Per solve, for the exact solvers
+        self.repeats = repeats
+        self.measure_memory = measure_memory
+        self.corpus = self.load_corpus(corpus_directory)
+        self.algorithms, self.unavailable = self.load_algorithms(algorithms)
+
+    def load_corpus(self, directory: str) -> InstanceCorpus:
+        """Open the corpus under directory, generating it first if it is missing or covers other (seed, N) pairs."""
+        try:
+            corpus = InstanceCorpus(directory)
+            if all((self.seed, N) in corpus.positions for N in self.Ns):
+                return corpus
+        except FileNotFoundError:
+            pass
+        return InstanceGenerator().save_corpus(directory, [self.seed], self.Ns)
+
+    def load_algorithms(self, algorithms) -> Tuple[List[Tuple[str, object, int]], Dict[str, str]]:
+        available = []
+        unavailable = {}
+        for name, module_name, class_name, max_students in algorithms:
+            try:
+                algorithm = getattr(importlib.import_module(module_name), class_name)()
+            except ImportError as error:
+                unavailable[name] = str(error)
+                continue
+            available.append((name, algorithm, max_students))
+        return available, unavailable
+
+    @staticmethod
+    def case_key(name: str, N: int, delta_T: float) -> str:
+        return f"{name}|N={N}|delta_T={delta_T}"
+
+    def run(self) -> Dict:
+        """Run every case and return the report that is stored as JSON."""
+        cases = {}
+        for name, reason in self.unavailable.items():
+            print(f"Skipping {name}: {reason}")
+
+        for N in self.Ns:
+            s = max(1, round(N * self.socket_ratio))
+            for delta_T in self.delta_Ts:
+                optimization_instance = self.corpus.create_instance(self.seed, N, s, self.T, delta_T, self.time_limit)
+                for name, algorithm, max_students in self.algorithms:
+                    if N > max_students:
+                        continue
+                    print(f"Benchmarking {name} with N={N}, delta_T={delta_T}")
+                    cases[self.case_key(name, N, delta_T)] = self.run_case(algorithm, optimization_instance)
+
+        return {
+            'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'numpy': np.__version__},
+            'settings': {'Ns': self.Ns, 'delta_Ts': self.delta_Ts, 'T': self.T, 'socket_ratio': self.socket_ratio,
+                         'seed': self.seed, 'time_limit': self.time_limit, 'repeats': self.repeats},
+            'unavailable': self.unavailable,
+            'cases': cases,
+        }
+
+    def run_case(self, algorithm, optimization_instance) -> Dict:
+        measurements = []
+        try:
+            for _ in range(self.repeats):
+                start_time = time.perf_counter()
+                result = algorithm.optimize_allocation(optimization_instance)
+                total_time = time.perf_counter() - start_time
+                model_build_time = result.get('model_build_time') or 0
+                solve_time = result.get('optimization_time') or 0
+                measurements.append({
+                    'total_time': total_time,
+                    'model_build_time': model_build_time,
+                    'solve_time': solve_time,
+                    'extraction_time': max(0.0, total_time - model_build_time - solve_time),
+                })
+            peak_memory_mb = self.peak_memory(algorithm, optimization_instance) if self.measure_memory else None
+        except Exception as error:
+            # e.g. a size-limited solver license; the rest of the suite still runs
+            print(f" Failed: {error}")
+            return {'status': 'error', 'error': str(error)}
+
+        case = {metric: min(measurement[metric] for measurement in measurements) for metric in TIME_METRICS}
+        score = result.get('fair_maximized_usage_score')
+        case.update(status=result['status'], score=None if score is None else float(score), peak_memory_mb=peak_memory_mb)
+        return case
+
+    def peak_memory(self, algorithm, optimization_instance) -> float:
+        # Traced separately because tracemalloc slows down the pure Python algorithms
+        tracemalloc.start()
+        try:
+            algorithm.optimize_allocation(optimization_instance)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak / 2 ** 20
+
+    @staticmethod
+    def find_regressions(report: Dict, baseline: Dict, threshold: float = 0.25, min_seconds: float = 0.005,
+                         min_megabytes: float = 1.0) -> List[str]:
+        """Cases where a metric grew by more than threshold (relative) over the baseline.
+
+        Differences under min_seconds or min_megabytes are ignored, since very short runs are mostly noise.
+        """
+        regressions = []
+        for key, case in report['cases'].items():
+            baseline_case = baseline['cases'].get(key)
+            if baseline_case is None or case['status'] == 'error' or baseline_case['status'] == 'error':
+                continue
+            for metric in TIME_METRICS + MEMORY_METRICS:
+                current, previous = case.get(metric), baseline_case.get(metric)
+                if current is None or previous is None:
+                    continue
+                minimum_change = min_megabytes if metric in MEMORY_METRICS else min_seconds
+                if current > previous * (1 + threshold) and current - previous > minimum_change:
+                    regressions.append(f"{key}: {metric} {previous:.4g} -> {current:.4g} (+{(current / previous - 1) * 100:.0f}%)"
+                                       if previous > 0 else f"{key}: {metric} 0 -> {current:.4g}")
+        return regressions
+
+    @staticmethod
+    def save_report(report: Dict, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    @staticmethod
+    def load_report(path: str) -> Optional[Dict]:
+        if not os.path.exists(path):
+            return None
+        with open(path) as file:
+            return json.load(file)
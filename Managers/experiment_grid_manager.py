@@ -0,0 +1,204 @@
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from Managers.optimizationInstance_manager import OptimizationInstanceManager
+from Managers.result_cache import ResultCache
+from Algorithms.heuristic_algorithm import HeuristicOptimization
+from Algorithms.gurobi_algorithm import GurobiOptimization
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
+from Algorithms.bounds import meets_upper_bound
+
+ALGORITHMS = ('heuristic', 'gurobi')
+
+# Largest socket count still needed by the sweep, shared with the worker processes. Jobs for more sockets stop early
+max_needed_sockets = None
+
+def init_worker(shared_max_needed_sockets) -> None:
+    global max_needed_sockets
+    max_needed_sockets = shared_max_needed_sockets
+
+def is_needed(job: Dict) -> bool:
+    return max_needed_sockets is None or job['s'] <= max_needed_sockets.value
+
+def run_experiment_job(job: Dict) -> Optional[Dict]:
+    """Solve one (N, s, seed, algorithm) job in a worker process and return only the scalar results.
+
+    Returns None for a job the sweep no longer needs. A Gurobi solve is terminated as soon as its job isn't needed.
+    """
+    if not is_needed(job):
+        return None
+    manager = OptimizationInstanceManager(job['seed'])
+    optimization_instance = manager.create_instance(job['N'], job['s'], job['T'], job['delta_T'], job['time_limit'])
+
+    if job['algorithm'] == 'gurobi':
+        algorithm = GurobiOptimization(job['threads'], record_trace=job['record_trace'], should_stop=lambda: not is_needed(job))
+        if job['skip_proven_optimal']:
+            # When the heuristic already reaches the score upper bound, that is the exact optimum. Gurobi
+            # didn't run, so there are no times to average into its execution times
+            heuristic_result = VectorizedHeuristicOptimization().optimize_allocation(optimization_instance)
+            if meets_upper_bound(heuristic_result, optimization_instance):
+                return {'z': heuristic_result['min_usage_time'], 'u': heuristic_result['A'], 'model_build_time': None, 'optimization_time': None}
+    else:
+        algorithm = HeuristicOptimization()
+
+    result_cache = ResultCache(job['cache_directory']) if job['cache_directory'] else None
+    key = result_cache.key(algorithm, optimization_instance) if result_cache else None
+    result = result_cache.get(key) if result_cache else None
+
+    if result is not None:
+        # Report the timings recorded when the entry was computed
+        optimization_time = result['optimization_time'] + result['model_build_time']
+    else:
+        start_time = time.time()
+        result = algorithm.optimize_allocation(optimization_instance)
+        optimization_time = time.time() - start_time
+        if result_cache:
+            result_cache.put(key, result)
+
+    return {
+        'z': result.get('min_usage_time'),
+        'u': result.get('A'),
+        'model_build_time': result.get('model_build_time', 0),
+        'optimization_time': optimization_time,
+        'trace': result.get('solver_trace')
+    }
+
+class ExperimentGridManager:
+    """Runs the heuristic and Gurobi over a grid of (N, s, seed) instances on a process pool."""
+
+    def __init__(self, T: float, delta_T: float, time_limit: int, num_seeds: int = 10, max_workers: Optional[int] = None,
+                 cache_directory: Optional[str] = None, skip_proven_optimal: bool = False, record_trace: bool = False) -> None:
+        self.T = T
+        self.delta_T = delta_T
+        self.time_limit = time_limit
+        self.num_seeds = num_seeds
+        self.cache_directory = cache_directory  # Reuse results of earlier sweeps from this ResultCache directory
+        self.skip_proven_optimal = skip_proven_optimal  # Skip Gurobi where the heuristic reaches the score upper bound
+        self.record_trace = record_trace  # Return Gurobi's incumbent/bound trace with every row as 'gurobi_trace'
+        self.max_workers = max_workers or os.cpu_count()
+        # Split the cores between the workers so concurrent Gurobi solves don't oversubscribe them
+        self.threads_per_worker = max(1, os.cpu_count() // self.max_workers)
+
+    def create_jobs(self, N: int, s: int) -> List[Dict]:
+        return [{'N': N, 's': s, 'seed': seed, 'algorithm': algorithm, 'T': self.T, 'delta_T': self.delta_T,
+                 'time_limit': self.time_limit, 'threads': self.threads_per_worker, 'cache_directory': self.cache_directory,
+                 'skip_proven_optimal': self.skip_proven_optimal, 'record_trace': self.record_trace}
+                for seed in range(self.num_seeds) for algorithm in ALGORITHMS]
+
+    def is_optimal(self, outcomes: Dict, s: int) -> bool:
+        num_time_slots = math.ceil(self.T / self.delta_T)
+        return all(outcomes[(s, seed, algorithm)]['z'] is not None and outcomes[(s, seed, algorithm)]['z'] >= num_time_slots
+                   for seed in range(self.num_seeds) for algorithm in ALGORITHMS)
+
+    def create_row(self, N: int, s: int, seed: int, outcomes: Dict) -> Dict:
+        heuristic_outcome = outcomes[(s, seed, 'heuristic')]
+        gurobi_outcome = outcomes[(s, seed, 'gurobi')]
+        return {
+            'N': N,
+            's': s,
+            'seed': seed,
+            'heuristic_z': heuristic_outcome['z'],
+            'heuristic_u': heuristic_outcome['u'],
+            'heuristic_optimization_time': heuristic_outcome['optimization_time'],
+            'gurobi_z': gurobi_outcome['z'],
+            'gurobi_u': gurobi_outcome['u'],
+            'gurobi_model_build_time': gurobi_outcome['model_build_time'],
+            'gurobi_optimization_time': gurobi_outcome['optimization_time'],
+            'gurobi_trace': gurobi_outcome.get('trace')
+        }
+
+    def run_socket_sweep(self, N: int, completed_rows: Optional[Dict[Tuple[int, int], Dict]] = None,
+                         on_row: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Sweep s = 1..N and stop at the first s where every seed reaches continuous usage with both algorithms.
+
+        Jobs for several socket counts run concurrently. Once some s is known to be optimal, pending
+        jobs for larger s are cancelled and running Gurobi solves for them are terminated, so no solve
+        outlives the sweep and the next sweep gets every core. Rows come back ordered by (s, seed), as
+        in the serial sweep. completed_rows maps (s, seed) to rows of an interrupted run, which are
+        reused instead of solved again. on_row is called with every new row once both of its jobs have
+        finished and every smaller s is finished without being optimal, so it only sees rows the sweep keeps.
+        """
+        completed_rows = completed_rows or {}
+        outcomes = {}
+        pending = {}
+        remaining_jobs = {}
+        ready_rows = {}  # (s, seed) of finished rows not yet passed to on_row
+        next_s = 1
+        stop_s = None
+        shared_max_needed_sockets = multiprocessing.RawValue('i', N)
+        finished = False
+
+        def stop_at(s):
+            nonlocal stop_s
+            stop_s = s
+            shared_max_needed_sockets.value = s
+            print(f" Optimal was found for socket: {stop_s}")
+
+        def kept_up_to():
+            # Every s below the returned one is finished and not optimal, so the sweep keeps its rows
+            s = 1
+            while s < N and remaining_jobs.get(s) == 0 and not self.is_optimal(outcomes, s):
+                s += 1
+            return s if stop_s is None else min(s, stop_s)
+
+        for (s, seed), row in completed_rows.items():
+            outcomes[(s, seed, 'heuristic')] = {'z': row['heuristic_z'], 'u': row['heuristic_u'], 'model_build_time': 0,
+                                                'optimization_time': row['heuristic_optimization_time']}
+            outcomes[(s, seed, 'gurobi')] = {'z': row['gurobi_z'], 'u': row['gurobi_u'], 'model_build_time': row['gurobi_model_build_time'],
+                                             'optimization_time': row['gurobi_optimization_time']}
+
+        executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker, initargs=(shared_max_needed_sockets,))
+        try:
+            while True:
+                # Keep the pool busy with the next socket counts, in order
+                while stop_s is None and next_s <= N and len(pending) < 2 * self.max_workers:
+                    jobs = [job for job in self.create_jobs(N, next_s) if (next_s, job['seed']) not in completed_rows]
+                    remaining_jobs[next_s] = len(jobs)
+                    for job in jobs:
+                        pending[executor.submit(run_experiment_job, job)] = job
+                    print(f" Queued sockets: {next_s}")
+                    if not jobs and self.is_optimal(outcomes, next_s):
+                        stop_at(next_s)
+                    next_s += 1
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    # Jobs past stop_s were stopped early, their outcomes are not kept
+                    if future.cancelled() or (stop_s is not None and job['s'] > stop_s):
+                        continue
+                    outcomes[(job['s'], job['seed'], job['algorithm'])] = future.result()
+                    remaining_jobs[job['s']] -= 1
+                    if all((job['s'], job['seed'], algorithm) in outcomes for algorithm in ALGORITHMS):
+                        ready_rows[(job['s'], job['seed'])] = True
+
+                    if remaining_jobs[job['s']] == 0 and self.is_optimal(outcomes, job['s']) and (stop_s is None or job['s'] < stop_s):
+                        stop_at(job['s'])
+                        for other_future, other_job in list(pending.items()):
+                            if other_job['s'] > stop_s and other_future.cancel():
+                                pending.pop(other_future)
+
+                last_kept_s = kept_up_to()
+                for s, seed in sorted(ready_rows):
+                    if s <= last_kept_s:
+                        del ready_rows[(s, seed)]
+                        if on_row:
+                            on_row(self.create_row(N, s, seed, outcomes))
+
+                if stop_s is not None and all(remaining_jobs[s] == 0 for s in range(1, stop_s + 1)):
+                    break
+            finished = True
+        finally:
+            if not finished:
+                shared_max_needed_sockets.value = 0  # Terminate every running solve
+            # The running solves past stop_s have been told to terminate, so this doesn't wait for their time limit
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        last_s = stop_s if stop_s is not None else N
+        return [self.create_row(N, s, seed, outcomes) for s in range(1, last_s + 1) for seed in range(self.num_seeds)]
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Iterable, List, Sequence, Tuple
+import numpy as np
+from Entities.optimization_instance import OptimizationInstance, StudentViews
+
+class InstanceGenerator:
+    """Creates instances from independent np.random.Generator streams, one per (seed, N).
+
+    Same distributions as OptimizationInstanceManager, but no global random state is touched, so an
+    instance only depends on its (seed, N) key and not on what was generated before it or in which
+    process. The draws differ from OptimizationInstanceManager, which keeps the legacy instances.
+    """
+
+    recharge_rate_avg = 33.33
+    discharge_rate_avg = 20.0
+    recharge_rate_std = 5.0
+    discharge_rate_std = 5.0
+
+    def stream(self, seed: int, N: int) -> np.random.Generator:
+        return np.random.Generator(np.random.PCG64(np.random.SeedSequence([seed, N])))
+
+    def create_student_data(self, seeds: Sequence[int], N: int) -> np.ndarray:
+        """Return a (len(seeds), 3, N) block with the recharge rates, discharge rates and initial batteries of every seed."""
+        student_data = np.empty((len(seeds), 3, N))
+        for index, seed in enumerate(seeds):
+            generator = self.stream(seed, N)
+            generator.standard_normal(out=student_data[index, 0])
+            generator.standard_normal(out=student_data[index, 1])
+            generator.random(out=student_data[index, 2])
+
+        # Shift and scale all seeds at once
+        student_data[:, 0] = np.clip(self.recharge_rate_avg + self.recharge_rate_std * student_data[:, 0], 10, 50)
+        student_data[:, 1] = np.clip(self.discharge_rate_avg + self.discharge_rate_std * student_data[:, 1], 10, 30)
+        student_data[:, 2] = 20 + 60 * student_data[:, 2]
+        return student_data
+
+    def create_instances(self, seeds: Sequence[int], N: int, s: int, T: int, delta_T: float, time_limit: int = 0) -> List[OptimizationInstance]:
+        student_data = self.create_student_data(seeds, N)
+        return [OptimizationInstance(StudentViews(block), s, T, delta_T, time_limit) for block in student_data]
+
+    def create_instance(self, seed: int, N: int, s: int, T: int, delta_T: float, time_limit: int = 0) -> OptimizationInstance:
+        return self.create_instances([seed], N, s, T, delta_T, time_limit)[0]
+
+    def save_corpus(self, directory: str, seeds: Sequence[int], Ns: Iterable[int]) -> 'InstanceCorpus':
+        """Generate every (seed, N) pair into a memory-mapped corpus under directory and open it."""
+        Ns = list(Ns)
+        total_students = len(seeds) * sum(Ns)
+        os.makedirs(directory, exist_ok=True)
+
+        student_data = np.lib.format.open_memmap(os.path.join(directory, InstanceCorpus.DATA_FILE), mode='w+',
+                                                 dtype=float, shape=(3, total_students))
+        index = np.empty((len(seeds) * len(Ns), 3), dtype=np.int64)
+        offset = 0
+        row = 0
+        for N in Ns:
+            # One (3, num_seeds * N) slab per N, with the seeds laid out one after the other
+            block = self.create_student_data(seeds, N)
+            student_data[:, offset:offset + len(seeds) * N] = block.transpose(1, 0, 2).reshape(3, -1)
+            for seed in seeds:
+                index[row] = (seed, N, offset)
+                offset += N
+                row += 1
+        student_data.flush()
+        del student_data
+
+        np.save(os.path.join(directory, InstanceCorpus.INDEX_FILE), index)
+        with open(os.path.join(directory, InstanceCorpus.METADATA_FILE), 'w') as file:
+            json.dump({'generator': type(self).__name__, 'seeds': list(map(int, seeds)), 'Ns': Ns}, file)
+        return InstanceCorpus(directory)
+
+class InstanceCorpus:
+    """Read-only view of a corpus written by InstanceGenerator.save_corpus.
+
+    The student arrays are memory-mapped, so opening a corpus costs nothing and worker processes
+    share the page cache instead of regenerating or copying instances.
+    """
+
+    DATA_FILE = 'student_data.npy'
+    INDEX_FILE = 'index.npy'
+    METADATA_FILE = 'metadata.json'
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.student_data = np.load(os.path.join(directory, self.DATA_FILE), mmap_mode='r')
+        self.index = np.load(os.path.join(directory, self.INDEX_FILE))
+        self.positions = {(int(seed), int(N)): row for row, (seed, N, _) in enumerate(self.index)}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def keys(self) -> List[Tuple[int, int]]:
+        return list(self.positions)
+
+    def student_block(self, seed: int, N: int) -> np.ndarray:
+        _, _, offset = self.index[self.positions[(seed, N)]]
+        return self.student_data[:, offset:offset + N]
+
+    def create_instance(self, seed: int, N: int, s: int, T: int, delta_T: float, time_limit: int = 0) -> OptimizationInstance:
+        """Instance over the mapped arrays of (seed, N). Nothing is copied, so the instance is read-only."""
+        return OptimizationInstance(StudentViews(self.student_block(seed, N)), s, T, delta_T, time_limit)
@@ -1,7 +1,6 @@
 from typing import List
 import random
 import numpy as np
-from Entities.student import Student
 from Entities.optimization_instance import OptimizationInstance
 
 class OptimizationInstanceManager:
@@ -29,10 +28,5 @@ class OptimizationInstanceManager:
 
         initial_battery_levels = np.random.uniform(20, 80, N) 
 
-        students = [
-            Student(recharge_rate, discharge_rate, initial_battery)
-            for recharge_rate, discharge_rate, initial_battery in zip(recharge_rates, discharge_rates, initial_battery_levels)
-        ]
-
-        return OptimizationInstance(students, s, T, delta_T,time_limit)
+        return OptimizationInstance.from_arrays(recharge_rates, discharge_rates, initial_battery_levels, s, T, delta_T, time_limit)
 
@@ -1,27 +1,164 @@
-from typing import Dict, List
+import multiprocessing
+import queue
+import time
+from typing import Callable, Dict, List, Optional
 from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Managers.result_cache import ResultCache
+from Algorithms.bounds import meets_upper_bound
+
+def run_portfolio_member(index: int, algorithm, optimization_instance: OptimizationInstance, results) -> None:
+    """Run one portfolio algorithm in its own process, putting its incumbents and final result on the results queue."""
+    if hasattr(algorithm, 'on_incumbent'):
+        # Solvers that report incumbents during the solve stream them back as well
+        algorithm.on_incumbent = lambda result: results.put(('incumbent', index, result))
+    try:
+        result = algorithm.optimize_allocation(optimization_instance)
+    except Exception as error:
+        results.put(('error', index, f"{type(error).__name__}: {error}"))
+        return
+    results.put(('final', index, result))
 
 class OptimizationManager:
-    def __init__(self, algorithms):
+    def __init__(self, algorithms, result_cache: Optional[ResultCache] = None, skip_proven_optimal: bool = True):
         self.algorithms = algorithms
+        self.result_cache = result_cache
+        self.skip_proven_optimal = skip_proven_optimal  # Don't run exact solvers once an earlier result reaches the score upper bound
 
-    def run_optimization(self, optimization_instance: OptimizationInstance):
+    def run_optimization(self, optimization_instance: OptimizationInstance, use_cache: bool = True):
         results = []
+        proven_optimal = None
         for algorithm in self.algorithms:
             print(f"Running {algorithm.name}...")
-            result = algorithm.optimize_allocation(optimization_instance)
+            if proven_optimal is not None and getattr(algorithm, 'exact', False):
+                proven_name, proven_result = proven_optimal
+                print(f"Skipped, {proven_name} already reached the score upper bound.")
+                result = self.skipped_result(proven_name, proven_result)
+            else:
+                result = self.run_algorithm(algorithm, optimization_instance, use_cache)
+                if result.get('cache_hit'):
+                    print("Loaded from the result cache.")
+                if self.skip_proven_optimal and proven_optimal is None and meets_upper_bound(result, optimization_instance):
+                    proven_optimal = (algorithm.name, result)
             results.append((algorithm.name, result))
             print("\n")
         self.print_results(results, optimization_instance)
         return results
 
+    def run_portfolio(self, optimization_instance: OptimizationInstance, deadline: float,
+                      on_incumbent: Optional[Callable[[str, float, OptimizationResult], None]] = None) -> OptimizationResult:
+        """Run all algorithms concurrently, one process each, and return the best result found within deadline seconds.
+
+        Results come back as they arrive, including the incumbents of solvers that report them during
+        the solve (GurobiOptimization). on_incumbent is called with (algorithm name, seconds since the
+        start, result) whenever the best score improves. At the deadline, or as soon as a result reaches
+        the score upper bound when skip_proven_optimal is set, the remaining processes are terminated.
+        The returned result is the best one with portfolio_winner, portfolio_time (when it arrived),
+        portfolio_incumbents as (time, name, score) and the portfolio_finished, portfolio_cancelled
+        and portfolio_errors of the algorithms. The result cache is not used.
+        """
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=run_portfolio_member, args=(index, algorithm, optimization_instance, results), daemon=True)
+                     for index, algorithm in enumerate(self.algorithms)]
+        start_time = time.time()
+        for process in processes:
+            process.start()
+
+        best_index, best_result, best_time = None, None, None
+        incumbents = []
+        finished = set()
+        errors = {}
+        try:
+            while len(finished) < len(processes):
+                time_left = start_time + deadline - time.time()
+                if time_left <= 0:
+                    break
+                try:
+                    kind, index, payload = results.get(timeout=min(time_left, 0.1))
+                except queue.Empty:
+                    # A process that died without reporting, e.g. killed for running out of memory
+                    for index, process in enumerate(processes):
+                        if index not in finished and not process.is_alive() and results.empty():
+                            finished.add(index)
+                            errors[self.algorithms[index].name] = f"Exited with code {process.exitcode}"
+                    continue
+
+                name = self.algorithms[index].name
+                if kind == 'error':
+                    finished.add(index)
+                    errors[name] = payload
+                    print(f" {name} failed: {payload}")
+                    continue
+                if kind == 'final':
+                    finished.add(index)
+
+                result = payload
+                score = result.get('fair_maximized_usage_score') if result['status'] == 'optimal' else None
+                if score is None or (best_result is not None and score <= best_result['fair_maximized_usage_score'] + 1e-9):
+                    continue
+                best_index, best_result, best_time = index, result, time.time() - start_time
+                incumbents.append((best_time, name, float(score)))
+                print(f" {best_time:.2f}s: {name} improved the best score to {score}")
+                if on_incumbent:
+                    on_incumbent(name, best_time, result)
+                if self.skip_proven_optimal and meets_upper_bound(result, optimization_instance):
+                    print(f" {name} reached the score upper bound.")
+                    break
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+
+        if best_result is None:
+            best_result = OptimizationResult(status='not_optimal')
+        best_result['portfolio_winner'] = None if best_index is None else self.algorithms[best_index].name
+        best_result['portfolio_time'] = best_time
+        best_result['portfolio_incumbents'] = incumbents
+        best_result['portfolio_finished'] = [self.algorithms[index].name for index in sorted(finished) if self.algorithms[index].name not in errors]
+        best_result['portfolio_cancelled'] = [algorithm.name for index, algorithm in enumerate(self.algorithms) if index not in finished]
+        best_result['portfolio_errors'] = errors
+
+        self.print_parameters(optimization_instance)
+        if best_index is not None:
+            print(f"Portfolio winner: {best_result['portfolio_winner']} after {best_time:.2f} seconds")
+            self.print_algorithm_results(best_result['portfolio_winner'], best_result, optimization_instance)
+        else:
+            print(f"No algorithm found a solution within {deadline} seconds.\n")
+        return best_result
+
+    def run_algorithm(self, algorithm, optimization_instance: OptimizationInstance, use_cache: bool = True):
+        """Run one algorithm, answering from the result cache when one is set and use_cache is True.
+
+        Pass use_cache=False for timing runs so every algorithm really executes.
+        """
+        if self.result_cache is None or not use_cache:
+            return algorithm.optimize_allocation(optimization_instance)
+
+        key = self.result_cache.key(algorithm, optimization_instance)
+        result = self.result_cache.get(key)
+        if result is not None:
+            result['cache_hit'] = True
+            return result
+
+        result = algorithm.optimize_allocation(optimization_instance)
+        self.result_cache.put(key, result)
+        return result
+
+    def skipped_result(self, proven_name: str, proven_result: OptimizationResult) -> OptimizationResult:
+        """The proven optimal result standing in for an exact solver that was not run."""
+        values = {key: value for key, value in proven_result.to_dict().items() if key != 'cache_hit'}
+        values.update(model_build_time=0, optimization_time=0, skipped_by_bound=True, proven_optimal_by=proven_name)
+        return OptimizationResult(**values)
+
     def print_results(self, results, optimization_instance: OptimizationInstance):
         self.print_parameters(optimization_instance)
         for name, result in results:
             self.print_algorithm_results(name, result, optimization_instance)
 
     def print_parameters(self, optimization_instance: OptimizationInstance):
-        print(f"Number of students: {len(optimization_instance.students)}")
+        print(f"Number of students: {optimization_instance.num_students}")
         print(f"Number of sockets: {optimization_instance.num_sockets}")
         print(f"Total time (T): {optimization_instance.total_time}")
         print(f"Delta time (ΔT): {optimization_instance.delta_t}")
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import tempfile
+import types
+from typing import Any, Optional
+import numpy as np
+from Entities.optimization_instance import OptimizationInstance
+from Entities.optimization_result import OptimizationResult
+from Entities.schedule import Schedule
+
+class ResultCache:
+    """Content-addressed on-disk cache of algorithm results.
+
+    Keys hash the instance arrays, the instance parameters and an algorithm tag built from the
+    algorithm's class, name, `version` attribute and settings, including nested ones such as an
+    initial_solver or the instrumentation. Objects that collect state while they run (e.g.
+    PhaseProfiler) declare their configuration with a cache_settings() method, which is used instead
+    of their attributes. Bump an algorithm's `version` when its output changes.
+    Results that stopped early (`stopped_early`, e.g. on the time limit) depend on the machine and
+    are not cached. Entries are compressed .npz files. Once the directory exceeds max_bytes, the
+    least recently used entries are removed.
+    """
+
+    def __init__(self, directory: str = '.result_cache', max_bytes: int = 1024 ** 3) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def algorithm_tag(self, algorithm) -> str:
+        return json.dumps(self.setting_value(algorithm), sort_keys=True)
+
+    def setting_value(self, value: Any, depth: int = 0) -> Any:
+        """A stable JSON value for a setting, going through the settings of nested objects.
+
+        Functions such as callbacks don't change the result and are left out, as None.
+        """
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return [str(value.dtype), list(value.shape), hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()]
+        if isinstance(value, (list, tuple)):
+            return [self.setting_value(item, depth + 1) for item in value]
+        if isinstance(value, dict):
+            return {str(name): self.setting_value(item, depth + 1) for name, item in value.items()}
+        if isinstance(value, (types.FunctionType, types.MethodType, types.BuiltinFunctionType)):
+            return None
+        settings = {}
+        if hasattr(value, 'cache_settings'):
+            settings = self.setting_value(value.cache_settings(), depth + 1)
+        elif hasattr(value, '__dict__') and depth < 8:
+            settings = {name: self.setting_value(item, depth + 1) for name, item in sorted(vars(value).items())}
+        return [type(value).__qualname__, getattr(value, 'version', 1), settings]
+
+    def key(self, algorithm, optimization_instance: OptimizationInstance) -> str:
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(optimization_instance.student_data, dtype=float).tobytes())
+        parameters = [optimization_instance.num_sockets, optimization_instance.total_time, optimization_instance.delta_t,
+                      optimization_instance.time_limit, optimization_instance.num_students]
+        digest.update(json.dumps(parameters).encode())
+        digest.update(self.algorithm_tag(algorithm).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key: str) -> Optional[OptimizationResult]:
+        path = self.path(key)
+        try:
+            with np.load(path) as entry:
+                metadata = json.loads(str(entry['metadata']))
+                arrays = {name: entry[name] for name in ('U', 'Y', 'B') if name in entry.files}  # U and Y in older entries
+                if 'U_bits' in entry.files:
+                    arrays['schedule'] = Schedule.from_npz(entry)
+            os.utime(path)  # Mark as recently used
+        except (OSError, KeyError, ValueError):
+            return None
+
+        extras = metadata.pop('extras')
+        return OptimizationResult(**metadata, **arrays, **extras)
+
+    def put(self, key: str, result: OptimizationResult) -> None:
+        if result.get('stopped_early'):
+            return
+        metadata = {name: self.to_json_value(result[name]) for name in result.keys()
+                    if name not in ('schedule', 'B') and name not in result.extras}
+        try:
+            metadata['extras'] = json.loads(json.dumps({name: self.to_json_value(value) for name, value in result.extras.items()}))
+        except TypeError:
+            return  # Results carrying objects that can't be stored are simply not cached
+
+        arrays = {} if result.schedule is None else result.schedule.arrays()
+        if result.B is not None:
+            arrays['B'] = result.B
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as file:
+            np.savez_compressed(file, metadata=np.array(json.dumps(metadata)), **arrays)
+        os.replace(temporary_path, self.path(key))
+        self.evict()
+
+    def to_json_value(self, value):
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                try:
+                    status = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total_bytes -= size
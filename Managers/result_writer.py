@@ -0,0 +1,83 @@
+import csv
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+class CheckpointedCsvWriter:
+    """Streams result rows to `<path>.partial`, flushing and fsyncing every row as it is written.
+
+    If a partial file from an interrupted run exists and resume is set, its complete rows are kept
+    (a torn last line is dropped) and can be looked up by their key columns so finished jobs are
+    skipped. finalize() moves the file to its final name once the sweep is done.
+    """
+
+    def __init__(self, path: str, header: Sequence[str], key_columns: Sequence[str], resume: bool = True) -> None:
+        self.partial_path = path + '.partial'
+        self.header = list(header)
+        self.key_indices = [self.header.index(column) for column in key_columns]
+        self.completed_rows: Dict[Tuple[str, ...], List[str]] = {}
+
+        directory = os.path.dirname(self.partial_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume and os.path.exists(self.partial_path):
+            self.load_partial_file()
+        else:
+            with open(self.partial_path, mode='w', newline='') as file:
+                csv.writer(file).writerow(self.header)
+
+        self.file = open(self.partial_path, mode='a', newline='')
+        self.writer = csv.writer(self.file)
+
+    def load_partial_file(self) -> None:
+        with open(self.partial_path, mode='r', newline='') as file:
+            content = file.read()
+
+        # A crash can leave the last row half written, so everything after the last newline is discarded
+        complete_content = content[:content.rfind('\n') + 1]
+        rows = list(csv.reader(complete_content.splitlines()))
+        if not rows or rows[0] != self.header:
+            raise ValueError(f"{self.partial_path} does not start with the expected header {self.header}")
+
+        for row in rows[1:]:
+            self.completed_rows[self.row_key(row)] = row
+
+        with open(self.partial_path, mode='w', newline='') as file:
+            file.write(complete_content)
+
+        print(f" Resuming {self.partial_path} with {len(self.completed_rows)} completed rows")
+
+    def row_key(self, row: Sequence) -> Tuple[str, ...]:
+        return tuple(str(row[index]) for index in self.key_indices)
+
+    def is_completed(self, *key) -> bool:
+        return tuple(str(value) for value in key) in self.completed_rows
+
+    def completed_row(self, *key) -> Optional[Dict[str, str]]:
+        row = self.completed_rows.get(tuple(str(value) for value in key))
+        return None if row is None else dict(zip(self.header, row))
+
+    def write_row(self, row: Sequence) -> None:
+        self.writer.writerow(row)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.completed_rows[self.row_key(row)] = ['' if value is None else str(value) for value in row]  # As csv writes them
+
+    def finalize(self, path: str, rows: Optional[Iterable[Sequence]] = None) -> None:
+        """Publish the results under path. If rows are given they replace the streamed rows, e.g. to restore their order."""
+        self.file.close()
+        if rows is None:
+            os.replace(self.partial_path, path)
+            return
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.header)
+            writer.writerows(rows)
+        os.replace(temporary_path, path)
+        os.remove(self.partial_path)
+
+    def close(self) -> None:
+        self.file.close()
@@ -0,0 +1,148 @@
+import glob
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ('algorithm', 'N', 's', 'seed')
+VALUE_COLUMNS = ('z', 'u', 'model_build_time', 'optimization_time')
+
+# The CSV layouts the Gurobi vs heuristic sweeps have written: the N, s and seed columns, then the column
+# of each value per algorithm (None where the layout doesn't record it). Columns are found by name. In the
+# first layout, Seed is the last column and older files don't have it. Files without a seed column list
+# the seeds of each (N, s) in order.
+CSV_LAYOUTS = (
+    ('Students', 'Sockets', 'Seed', {
+        'heuristic': {'z': 'Heuristic_Z', 'u': 'Heuristic_U', 'model_build_time': None, 'optimization_time': 'Heuristic_Optimization_Time'},
+        'gurobi': {'z': 'Gurobi_Z', 'u': 'Gurobi_U', 'model_build_time': 'Gurobi_model_build_time', 'optimization_time': 'Gurobi_optimization_time'},
+    }),
+    ('N', 's', 'seed', {
+        'heuristic': {'z': 'heuristic_min_usage_time', 'u': None, 'model_build_time': None, 'optimization_time': 'heuristic_optimization_time'},
+        'gurobi': {'z': 'gurobi_min_usage_time', 'u': None, 'model_build_time': 'gurobi_model_build_time', 'optimization_time': 'gurobi_optimization_time'},
+    }),
+)
+
+class ResultsStore:
+    """All sweep results in one columnar .npz file, one row per (algorithm, N, s, seed).
+
+    update() ingests the CSVs of a results directory that are new or changed since the last call,
+    so the raw files are parsed once. When several files hold the same (algorithm, N, s, seed), the
+    newest one wins, going by the timestamp in the file name or else its modification time. CSVs in
+    other layouts (traces, summaries) are skipped. Missing values, e.g. u in the oldest layout, are nan.
+    The rows are kept as a DataFrame indexed by KEY_COLUMNS.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.sources: List[Dict] = []  # name, mtime and size of every ingested file, rows refer to them by position
+        self.frame = self.empty_frame()
+        if os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def empty_frame() -> pd.DataFrame:
+        columns = {column: pd.Series(dtype=object if column == 'algorithm' else np.int32) for column in KEY_COLUMNS}
+        columns.update({column: pd.Series(dtype=float) for column in VALUE_COLUMNS})
+        columns['source'] = pd.Series(dtype=np.int32)
+        return pd.DataFrame(columns).set_index(list(KEY_COLUMNS))
+
+    def load(self) -> None:
+        with np.load(self.path) as store:
+            self.sources = json.loads(str(store['metadata']))['sources']
+            columns = {column: store[column] for column in KEY_COLUMNS + VALUE_COLUMNS + ('source',)}
+        self.frame = pd.DataFrame(columns).set_index(list(KEY_COLUMNS))
+
+    def save(self) -> None:
+        rows = self.frame.reset_index()
+        columns = {column: rows[column].to_numpy() for column in KEY_COLUMNS + VALUE_COLUMNS + ('source',)}
+        columns['algorithm'] = columns['algorithm'].astype(str)
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as file:
+            np.savez(file, metadata=json.dumps({'sources': self.sources}), **columns)
+        os.replace(temporary_path, self.path)
+
+    def update(self, directory: str) -> int:
+        """Ingest the CSVs in directory that are new or changed and save the store if anything was added."""
+        known = {(source['name'], source['mtime'], source['size']) for source in self.sources}
+        paths = [path for path in sorted(glob.glob(os.path.join(directory, '*.csv')))
+                 if (os.path.basename(path), os.path.getmtime(path), os.path.getsize(path)) not in known]
+        added = self.ingest(paths)
+        if added:
+            self.save()
+        return added
+
+    def ingest(self, paths: Iterable[str]) -> int:
+        """Add the rows of the given CSVs, replacing the rows of earlier versions of the same files. Returns the rows read."""
+        frames = []
+        for path in paths:
+            rows = self.read_csv(path)
+            if rows is None:
+                continue
+            name = os.path.basename(path)
+            self.forget(name)
+            rows['source'] = len(self.sources)
+            self.sources.append({'name': name, 'mtime': os.path.getmtime(path), 'size': os.path.getsize(path),
+                                 'time': self.source_time(path)})
+            frames.append(rows)
+        if not frames:
+            return 0
+
+        rows = pd.concat([self.frame.reset_index()] + frames, ignore_index=True)
+        # The newest source of each key comes last
+        source_times = np.array([source['time'] for source in self.sources])
+        rows = rows.iloc[np.argsort(source_times[rows['source'].to_numpy()], kind='stable')]
+        rows = rows.drop_duplicates(list(KEY_COLUMNS), keep='last')
+        self.frame = rows.set_index(list(KEY_COLUMNS)).sort_index()
+        return sum(len(frame) for frame in frames)
+
+    def forget(self, name: str) -> None:
+        """Drop the rows of an ingested file, e.g. before ingesting a newer version of it."""
+        for position, source in enumerate(self.sources):
+            if source['name'] == name:
+                self.frame = self.frame[self.frame['source'] != position]
+                source['mtime'] = source['size'] = None
+
+    @staticmethod
+    def source_time(path: str) -> str:
+        match = re.search(r'(\d{8}_\d{6})\.csv$', path)
+        return match.group(1) if match else datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y%m%d_%H%M%S')
+
+    @staticmethod
+    def read_csv(path: str) -> Optional[pd.DataFrame]:
+        """The rows of one sweep CSV in long format, or None if it has none of the CSV_LAYOUTS."""
+        csv_rows = pd.read_csv(path)
+        for N_column, s_column, seed_column, algorithms in CSV_LAYOUTS:
+            value_columns = {column for values in algorithms.values() for column in values.values() if column is not None}
+            if not {N_column, s_column} | value_columns <= set(csv_rows.columns):
+                continue
+            if seed_column in csv_rows.columns:
+                seeds = csv_rows[seed_column]
+            else:
+                seeds = csv_rows.groupby([N_column, s_column]).cumcount()
+
+            frames = []
+            for algorithm, values in algorithms.items():
+                frame = pd.DataFrame({'algorithm': algorithm, 'N': csv_rows[N_column].astype(np.int32),
+                                      's': csv_rows[s_column].astype(np.int32), 'seed': seeds.astype(np.int32)})
+                for value, column in values.items():
+                    frame[value] = csv_rows[column].astype(float) if column is not None else np.nan
+                frames.append(frame)
+            return pd.concat(frames, ignore_index=True)
+        return None
+
+    def query(self, algorithm: Optional[str] = None, N: Optional[int] = None, s: Optional[int] = None) -> pd.DataFrame:
+        """Rows matching the given key values, through the index."""
+        key = tuple(slice(None) if value is None else value for value in (algorithm, N, s)) + (slice(None),)
+        return self.frame.loc[key, list(VALUE_COLUMNS)]
+
+    def aggregate(self, N: Optional[int] = None, metrics: Sequence[str] = VALUE_COLUMNS,
+                  statistics: Sequence[str] = ('mean', 'min', 'max')) -> pd.DataFrame:
+        """Statistics over the seeds of every (algorithm, N, s) in one groupby, columns (metric, statistic)."""
+        rows = self.frame if N is None else self.frame.xs(N, level='N', drop_level=False)
+        return rows.groupby(level=['algorithm', 'N', 's'])[list(metrics)].agg(list(statistics))
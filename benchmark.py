@@ -0,0 +1,45 @@
+import os
+import sys
+from datetime import datetime
+from Managers.benchmark_manager import BenchmarkManager
+
+# Flags
+update_baseline = False  # Store this run as the new baseline (it is always stored when there is none yet)
+measure_memory = True  # One extra traced run per case for the peak memory
+regression_threshold = 0.25  # Relative growth over the baseline that counts as a regression
+
+BENCHMARK_DIRECTORY = 'Benchmark Results'
+CORPUS_DIRECTORY = os.path.join(BENCHMARK_DIRECTORY, 'corpus')
+BASELINE_PATH = os.path.join(BENCHMARK_DIRECTORY, 'baseline.json')
+
+def main():
+    # Fixed corpus
+    Ns = [10, 100, 1000, 10000, 100000]
+    delta_Ts = [0.25, 0.5, 1]
+    T = 16
+    seed = 0
+    time_limit = 10
+
+    benchmark_manager = BenchmarkManager(CORPUS_DIRECTORY, Ns, delta_Ts, T, seed=seed, time_limit=time_limit,
+                                         measure_memory=measure_memory)
+    report = benchmark_manager.run()
+
+    current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+    BenchmarkManager.save_report(report, os.path.join(BENCHMARK_DIRECTORY, f'benchmark_{current_time}.json'))
+
+    baseline = BenchmarkManager.load_report(BASELINE_PATH)
+    regressions = []
+    if baseline is not None:
+        regressions = BenchmarkManager.find_regressions(report, baseline, regression_threshold)
+        print(f" {len(regressions)} regressions against {BASELINE_PATH}")
+        for regression in regressions:
+            print(f"  {regression}")
+    if baseline is None or update_baseline:
+        BenchmarkManager.save_report(report, BASELINE_PATH)
+        print(f" Baseline written to {BASELINE_PATH}")
+
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from Managers.optimizationInstance_manager import OptimizationInstanceManager
 from Managers.optimization_manager import OptimizationManager
+from Managers.result_cache import ResultCache
 from Algorithms.gurobi_algorithm import GurobiOptimization
 from Algorithms.heuristic_algorithm import HeuristicOptimization
 from Algorithms.gurobi_hybrid import GurobiHybridOptimization
+from Algorithms.highs_algorithm import HighsOptimization
 
 def main():
     #Parameters
@@ -12,17 +14,23 @@ def main():
     delta_T = 0.5
     seed = 4
     timeout = 10
+    use_cache = False  # Answer repeated runs from the result cache, keep off for timing runs
+    portfolio_deadline = None  # Seconds; run the algorithms concurrently and keep the best result found by then
 
     algorithms = []
     algorithms.append(HeuristicOptimization())
     algorithms.append(GurobiOptimization())
     # algorithms.append(GurobiHybridOptimization())
+    # algorithms.append(HighsOptimization())
 
     manager = OptimizationInstanceManager(seed)
     optimization_instance = manager.create_instance(N, s, T, delta_T,timeout)
 
-    optimization_manager = OptimizationManager(algorithms)
-    optimization_manager.run_optimization(optimization_instance)
+    optimization_manager = OptimizationManager(algorithms, ResultCache() if use_cache else None)
+    if portfolio_deadline is not None:
+        optimization_manager.run_portfolio(optimization_instance, portfolio_deadline)
+    else:
+        optimization_manager.run_optimization(optimization_instance, use_cache)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
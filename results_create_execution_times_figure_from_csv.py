@@ -1,55 +1,28 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from Managers.results_store import ResultsStore
 
-CSV_FILE_NAME = 'gurobi_vs_heuristic_N_39_20240707_163950.csv'
+N = 39  # Number of students to plot
+CSV_DIRECTORY_PATH = 'Gurobi vs Heuristic Comparison Results/'
+RESULTS_STORE_PATH = CSV_DIRECTORY_PATH + 'results_store.npz'
 
 def create_execution_time_histogram_from_csv():
-    CSV_DIRECTORY_PATH = 'Gurobi vs Heuristic Comparison Results/'
-    csv_file_path = CSV_DIRECTORY_PATH + CSV_FILE_NAME
-
-    df = pd.read_csv(csv_file_path)
-    sockets = sorted(df['Sockets'].unique())
+    # New or changed CSVs are added to the store, the rest is read from it
+    results_store = ResultsStore(RESULTS_STORE_PATH)
+    results_store.update(CSV_DIRECTORY_PATH)
+    statistics = results_store.aggregate(N, metrics=['model_build_time', 'optimization_time'])
+    heuristic = statistics.loc['heuristic', N]
+    gurobi = statistics.loc['gurobi', N]
+    sockets = list(heuristic.index)
 
     fig, ax1 = plt.subplots(figsize=(12, 6))
     heuristic_color = 'tab:blue'
     gurobi_build_color = 'tab:green'
     gurobi_opt_color = 'tab:orange'
 
-    heuristic_time_avg, heuristic_time_min, heuristic_time_max = [], [], []
-    gurobi_build_time_avg, gurobi_build_time_min, gurobi_build_time_max = [], [], []
-    gurobi_opt_time_avg, gurobi_opt_time_min, gurobi_opt_time_max = [], [], []
-
-    for socket in sockets:
-        socket_data = df[df['Sockets'] == socket]
-
-        heuristic_time = socket_data['Heuristic_Optimization_Time']
-
-        heuristic_time_avg.append(heuristic_time.mean())
-        heuristic_time_min.append(heuristic_time.min())
-        heuristic_time_max.append(heuristic_time.max())
-
-        gurobi_build_time = socket_data['Gurobi_model_build_time']
-
-        gurobi_build_time_avg.append(gurobi_build_time.mean())
-        gurobi_build_time_min.append(gurobi_build_time.min())
-        gurobi_build_time_max.append(gurobi_build_time.max())
-
-        gurobi_opt_time = socket_data['Gurobi_optimization_time']
-
-        gurobi_opt_time_avg.append(gurobi_opt_time.mean())
-        gurobi_opt_time_min.append(gurobi_opt_time.min())
-        gurobi_opt_time_max.append(gurobi_opt_time.max())
-
-    heuristic_time_avg = np.array(heuristic_time_avg)
-    heuristic_time_min = np.array(heuristic_time_min)
-    heuristic_time_max = np.array(heuristic_time_max)
-    gurobi_build_time_avg = np.array(gurobi_build_time_avg)
-    gurobi_build_time_min = np.array(gurobi_build_time_min)
-    gurobi_build_time_max = np.array(gurobi_build_time_max)
-    gurobi_opt_time_avg = np.array(gurobi_opt_time_avg)
-    gurobi_opt_time_min = np.array(gurobi_opt_time_min)
-    gurobi_opt_time_max = np.array(gurobi_opt_time_max)
+    heuristic_time_avg, heuristic_time_min, heuristic_time_max = (heuristic[('optimization_time', statistic)].to_numpy() for statistic in ('mean', 'min', 'max'))
+    gurobi_build_time_avg, gurobi_build_time_min, gurobi_build_time_max = (gurobi[('model_build_time', statistic)].to_numpy() for statistic in ('mean', 'min', 'max'))
+    gurobi_opt_time_avg, gurobi_opt_time_min, gurobi_opt_time_max = (gurobi[('optimization_time', statistic)].to_numpy() for statistic in ('mean', 'min', 'max'))
 
     heuristic_time_err = [heuristic_time_avg - heuristic_time_min, heuristic_time_max - heuristic_time_avg]
     gurobi_build_time_err = [gurobi_build_time_avg - gurobi_build_time_min, gurobi_build_time_max - gurobi_build_time_avg]
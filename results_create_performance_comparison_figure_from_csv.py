@@ -1,62 +1,29 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from Managers.results_store import ResultsStore
 
-CSV_FILE_NAME = 'gurobi_vs_heuristic_N_39_20240707_163950.csv'
+N = 39  # Number of students to plot
+CSV_DIRECTORY_PATH = 'Gurobi vs Heuristic Comparison Results/'
+RESULTS_STORE_PATH = CSV_DIRECTORY_PATH + 'results_store.npz'
 
 def create_histogram_from_csv():
-    CSV_DIRECTORY_PATH = 'Gurobi vs Heuristic Comparison Results/'
-    csv_file_path = CSV_DIRECTORY_PATH + CSV_FILE_NAME
-    
-    df = pd.read_csv(csv_file_path)
-    sockets = sorted(df['Sockets'].unique())
+    # New or changed CSVs are added to the store, the rest is read from it
+    results_store = ResultsStore(RESULTS_STORE_PATH)
+    results_store.update(CSV_DIRECTORY_PATH)
+    statistics = results_store.aggregate(N, metrics=['z', 'u'])
+    heuristic = statistics.loc['heuristic', N]
+    gurobi = statistics.loc['gurobi', N]
+    sockets = list(heuristic.index)
 
     fig, ax1 = plt.subplots(figsize=(12, 6))
     heuristic_color = 'tab:blue'
     gurobi_color = 'tab:orange'
 
-    heuristic_z_avg, heuristic_z_min, heuristic_z_max = [], [], []
-    heuristic_u_avg, heuristic_u_min, heuristic_u_max = [], [], []
-    gurobi_z_avg, gurobi_z_min, gurobi_z_max = [], [], []
-    gurobi_u_avg, gurobi_u_min, gurobi_u_max = [], [], []
-
-    for socket in sockets:
-        socket_data = df[df['Sockets'] == socket]
-
-        heuristic_z = socket_data['Heuristic_Z']
-        heuristic_u = socket_data['Heuristic_U'] * 32  # Multiply U by 32 to represent the average usage per student
-
-        heuristic_z_avg.append(heuristic_z.mean())
-        heuristic_z_min.append(heuristic_z.min())
-        heuristic_z_max.append(heuristic_z.max())
-
-        heuristic_u_avg.append(heuristic_u.mean())
-        heuristic_u_min.append(heuristic_u.min())
-        heuristic_u_max.append(heuristic_u.max())
-
-        gurobi_z = socket_data['Gurobi_Z']
-        gurobi_u = socket_data['Gurobi_U'] * 32  # Multiply U by 32 to represent the average usage per student
-
-        gurobi_z_avg.append(gurobi_z.mean())
-        gurobi_z_min.append(gurobi_z.min())
-        gurobi_z_max.append(gurobi_z.max())
-
-        gurobi_u_avg.append(gurobi_u.mean())
-        gurobi_u_min.append(gurobi_u.min())
-        gurobi_u_max.append(gurobi_u.max())
-
-    heuristic_z_avg = np.array(heuristic_z_avg)
-    heuristic_z_min = np.array(heuristic_z_min)
-    heuristic_z_max = np.array(heuristic_z_max)
-    heuristic_u_avg = np.array(heuristic_u_avg)
-    heuristic_u_min = np.array(heuristic_u_min)
-    heuristic_u_max = np.array(heuristic_u_max)
-    gurobi_z_avg = np.array(gurobi_z_avg)
-    gurobi_z_min = np.array(gurobi_z_min)
-    gurobi_z_max = np.array(gurobi_z_max)
-    gurobi_u_avg = np.array(gurobi_u_avg)
-    gurobi_u_min = np.array(gurobi_u_min)
-    gurobi_u_max = np.array(gurobi_u_max)
+    heuristic_z_avg, heuristic_z_min, heuristic_z_max = (heuristic[('z', statistic)].to_numpy() for statistic in ('mean', 'min', 'max'))
+    gurobi_z_avg, gurobi_z_min, gurobi_z_max = (gurobi[('z', statistic)].to_numpy() for statistic in ('mean', 'min', 'max'))
+    # Multiply U by 32 to represent the average usage per student
+    heuristic_u_avg, heuristic_u_min, heuristic_u_max = (heuristic[('u', statistic)].to_numpy() * 32 for statistic in ('mean', 'min', 'max'))
+    gurobi_u_avg, gurobi_u_min, gurobi_u_max = (gurobi[('u', statistic)].to_numpy() * 32 for statistic in ('mean', 'min', 'max'))
 
     heuristic_z_err = [heuristic_z_avg - heuristic_z_min, heuristic_z_max - heuristic_z_avg]
     gurobi_z_err = [gurobi_z_avg - gurobi_z_min, gurobi_z_max - gurobi_z_avg]
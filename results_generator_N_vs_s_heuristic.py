@@ -1,69 +1,131 @@
-import time
-import csv
+import os
 import random
+import time
 import numpy as np
 from datetime import datetime
 from Managers.optimizationInstance_manager import OptimizationInstanceManager
-from Managers.optimization_manager import OptimizationManager
-from Algorithms.heuristic_algorithm import HeuristicOptimization
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
+from Algorithms.bounds import socket_lower_bound
+from Managers.result_writer import CheckpointedCsvWriter
+
+# Flags
+use_galloping_search = True  # False scans every s upwards, True gallops then bisects (assumes success is monotone in s)
+resume_interrupted_runs = True  # Continue from the .partial file of an interrupted run instead of starting over
+
+RESULTS_DIRECTORY = 'N vs s Results'
 
 def main():
     # Fixed parameters
     T = 16
     delta_T = 0.5
-    results = []
-    algorithms = [HeuristicOptimization()]
+    heuristic = VectorizedHeuristicOptimization()
 
     # Define ranges and step sizes
     ranges = [(1, 101, 1),(100, 1001, 10), (1000, 10001, 100)]
-    
+
     optimal_s = 1  # Start with the minimum possible value of s
 
+    # Each N is appended to a .partial file as soon as it is done, so an interrupted run resumes at the next N
+    writer = CheckpointedCsvWriter(os.path.join(RESULTS_DIRECTORY, 'results.csv'),
+                                   ['N', 's', 'Average Execution Times', 'Execution Times'], ['N'], resume_interrupted_runs)
+
     for start, end, step in ranges:
         for N in range(start, end, step):
+            completed_row = writer.completed_row(N)
+            if completed_row is not None:
+                optimal_s = int(completed_row['s'])
+                continue
+
             print(f"Testing for N = {N}")
-            found_optimal_s = False
-            for s in range(optimal_s, N + 1):
-                consistent = True
-                execution_times = []
-                for seed in range(10):
-                    random.seed(seed)
-                    manager = OptimizationInstanceManager(seed)
-                    optimization_instance = manager.create_instance(N, s, T, delta_T)
-                    optimization_manager = OptimizationManager(algorithms)
-                    
-                    start_time = time.time()
-                    optimizationResults = optimization_manager.run_optimization(optimization_instance)
-                    end_time = time.time()
-                    
-                    result = optimizationResults[0][1]
-                    if result['fair_maximized_usage_score'] < 1+ (T / delta_T):
-                        consistent = False
-                        break
-                    execution_times.append(end_time - start_time)
-                
-                if consistent:
-                    optimal_s = s
-                    average_execution_time = np.mean(execution_times)
-                    results.append({
-                        'N': N,
-                        's': optimal_s,
-                        'average_execution_time': average_execution_time,
-                        'execution_times': execution_times
-                    })
-                    found_optimal_s = True
-                    break
-            
-            if not found_optimal_s:
+            optimization_instances = initialize_instances(N, T, delta_T)
+
+            if use_galloping_search:
+                search_start = max(optimal_s, socket_lower_bound(optimization_instances))
+                found_s, execution_times = find_min_sockets_galloping(heuristic, optimization_instances, search_start, N)
+            else:
+                found_s, execution_times = find_min_sockets_linear(heuristic, optimization_instances, optimal_s, N)
+
+            if found_s is not None:
+                optimal_s = found_s
+                average_execution_time = np.mean(execution_times)
+                writer.write_row([N, optimal_s, average_execution_time, *execution_times])
+            else:
                 print(f"No optimal s found for N = {N}")
 
-    # Write results to CSV file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    with open(f'N vs s Results\\results_{timestamp}.csv', mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(['N', 's', 'Average Execution Times', 'Execution Times'])
-        for result in results:
-            writer.writerow([result['N'], result['s'], result['average_execution_time'], *result['execution_times']])
+    writer.finalize(os.path.join(RESULTS_DIRECTORY, f'results_{timestamp}.csv'))
+
+def initialize_instances(N, T, delta_T, num_seeds=10):
+    # The student population does not depend on s, so each seed is generated once per N
+    optimization_instances = []
+    for seed in range(num_seeds):
+        random.seed(seed)
+        manager = OptimizationInstanceManager(seed)
+        optimization_instances.append(manager.create_instance(N, 1, T, delta_T))
+    return optimization_instances
+
+def with_sockets(optimization_instances, s):
+    return [instance.with_num_sockets(s) for instance in optimization_instances]
+
+def is_continuous_usage(result, optimization_instance):
+    return result['fair_maximized_usage_score'] >= 1+ (optimization_instance.total_time / optimization_instance.delta_t)
+
+def run_seeds(heuristic, optimization_instances, s):
+    """Run every seed with s sockets, stopping at the first seed without continuous usage.
+
+    The execution times are the wall time of each seed's run, as the original sweep recorded them.
+    """
+    execution_times = []
+    for optimization_instance in with_sockets(optimization_instances, s):
+        start_time = time.time()
+        result = heuristic.optimize_allocation(optimization_instance)
+        end_time = time.time()
+        if not is_continuous_usage(result, optimization_instance):
+            return False, execution_times
+        execution_times.append(end_time - start_time)
+    return True, execution_times
+
+def find_min_sockets_linear(heuristic, optimization_instances, start_s, N):
+    for s in range(start_s, N + 1):
+        # All seeds run in a single batched pass of the heuristic
+        socket_instances = with_sockets(optimization_instances, s)
+        optimizationResults = heuristic.optimize_allocations(socket_instances)
+        if all(is_continuous_usage(result, instance) for result, instance in zip(optimizationResults, socket_instances)):
+            # The batch only shares out its wall time, so the seeds are timed one by one like in the galloping search
+            _, execution_times = run_seeds(heuristic, optimization_instances, s)
+            return s, execution_times
+    return None, None
+
+def find_min_sockets_galloping(heuristic, optimization_instances, start_s, N):
+    if start_s > N:
+        return None, None
+
+    consistent, execution_times = run_seeds(heuristic, optimization_instances, start_s)
+    if consistent:
+        return start_s, execution_times
+
+    # Gallop upwards until a socket count works for every seed
+    failing_s, step = start_s, 1
+    while True:
+        candidate_s = min(failing_s + step, N)
+        consistent, execution_times = run_seeds(heuristic, optimization_instances, candidate_s)
+        if consistent:
+            passing_s, passing_times = candidate_s, execution_times
+            break
+        if candidate_s == N:
+            return None, None
+        failing_s, step = candidate_s, step * 2
+
+    # Bisect between the last failing and the first passing count
+    while passing_s - failing_s > 1:
+        middle_s = (failing_s + passing_s) // 2
+        consistent, execution_times = run_seeds(heuristic, optimization_instances, middle_s)
+        if consistent:
+            passing_s, passing_times = middle_s, execution_times
+        else:
+            failing_s = middle_s
+
+    return passing_s, passing_times
 
 if __name__ == "__main__":
     main()
@@ -8,7 +8,7 @@ from Algorithms.heuristic_algorithm import HeuristicOptimization
 from Algorithms.gurobi_algorithm import GurobiOptimization  
 from Algorithms.gurobi_hybrid import GurobiHybridOptimization  
 import matplotlib.pyplot as plt
-import seaborn as sns
+from Managers.allocation_renderer import draw_allocation
 import os
 
 # Flags
@@ -70,30 +70,8 @@ def create_colored_heatmap(ax, B, U, Y, T, delta_T, N, s, algorithm_name, Z):
     num_students = N
     avg_usage = np.mean(U)*num_intervals
 
-    data = np.round(B[:, :num_intervals]).astype(float) 
-
-    mask_green = (Y[:, :num_intervals] == 1)
-    mask_yellow = (Y[:, :num_intervals] == 0) & (U[:, :num_intervals] == 1)
-    mask_red = (Y[:, :num_intervals] == 0) & (U[:, :num_intervals] == 0)
-
-    data_green = data.copy()
-    data_yellow = data.copy()
-    data_red = data.copy()
-
-    cmap_green = sns.color_palette(["#006400"], as_cmap=True)
-    cmap_yellow = sns.color_palette(["#FFD700"], as_cmap=True)
-    cmap_red = sns.color_palette(["#8B0000"], as_cmap=True)
-
-    # Apply masks
-    data_green[~mask_green] = np.nan
-    data_yellow[~mask_yellow] = np.nan
-    data_red[~mask_red] = np.nan
-
-    annot = not hide_values_in_table
-
-    sns.heatmap(data_green, annot=annot, fmt=".0f" if annot else "", linewidths=.5, ax=ax, cmap=cmap_green, cbar=False, center=50)
-    sns.heatmap(data_yellow, annot=annot, fmt=".0f" if annot else "", linewidths=.5, ax=ax, cmap=cmap_yellow, cbar=False, center=50)
-    sns.heatmap(data_red, annot=annot, fmt=".0f" if annot else "", linewidths=.5, ax=ax, cmap=cmap_red, cbar=False, center=50)
+    # Charging, in use and off in one image, shaded by the battery level
+    draw_allocation(ax, B[:, :num_intervals], U[:, :num_intervals], Y[:, :num_intervals], annotate=not hide_values_in_table)
 
     if hide_results_in_header:
         ax.set_title(algorithm_name, fontsize=14, pad=10)
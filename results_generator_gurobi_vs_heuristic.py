@@ -1,37 +1,107 @@
 import time
-import csv
+import os
 import random
 from datetime import datetime
 from Managers.optimizationInstance_manager import OptimizationInstanceManager
 from Algorithms.heuristic_algorithm import HeuristicOptimization
 from Algorithms.gurobi_algorithm import GurobiOptimization
+from Algorithms.gurobi_session import GurobiSocketSweepSession
+from Managers.experiment_grid_manager import ExperimentGridManager
+from Managers.result_writer import CheckpointedCsvWriter
+from Algorithms.bounds import meets_upper_bound
+from Algorithms.solver_telemetry import trace_rows
 import numpy as np
 import math
 
+# Flags
+use_parallel_grid = True  # Spread the (s, seed, algorithm) jobs over a process pool
+max_workers = None  # Number of worker processes, None uses one per core
+result_cache_directory = None  # Parallel grid only: reuse earlier (N, s, seed) results from this directory, e.g. '.result_cache'. Keep None for timing runs
+use_persistent_gurobi = True  # Serial sweep only: keep one Gurobi model per seed and re-solve it as s grows
+skip_proven_optimal = False  # Skip Gurobi where the heuristic reaches the score upper bound, reporting its result with blank Gurobi times
+resume_interrupted_runs = True  # Continue from the .partial file of an interrupted run instead of starting over
+record_solver_traces = False  # Export Gurobi's incumbent, bound and gap over time to gurobi_traces_N_<N>_<time>.csv
+
+RESULTS_DIRECTORY = 'Gurobi vs Heuristic Comparison Results'
+# Seed comes last so the earlier columns keep the positions of the files written without it
+HEADER = ['Students', 'Sockets', 'Heuristic_Z', 'Heuristic_U', 'Heuristic_Optimization_Time',
+          'Gurobi_Z', 'Gurobi_U', 'Gurobi_model_build_time', 'Gurobi_optimization_time', 'Seed']
+ROW_KEYS = ['N', 's', 'heuristic_z', 'heuristic_u', 'heuristic_optimization_time',
+            'gurobi_z', 'gurobi_u', 'gurobi_model_build_time', 'gurobi_optimization_time', 'seed']
+TRACE_HEADER = ['Students', 'Sockets', 'Seed', 'Point', 'Time', 'Incumbent', 'Bound', 'Gap', 'Nodes']
+
 def main():
     # Fixed parameters
     T = 16
     delta_T = 0.5
-    num_time_slots = math.ceil(T / delta_T)
 
     ranges = [40]  # Define the range of N values to investigate
     timeout = 180
 
     for N in ranges:
-        results = []
         print(f" Generating for Number of students: {N}")
-        for s in range(1, N + 1):
-            print(f" Generating for sockets: {s}")
-            optimal = True
-            heuristic_u_scores = []
-            heuristic_optimization_times = []
-            heuristic_min_usage_times = []
-            gurobi_u_scores = []
-            gurobi_optimization_times = []
-            gurobi_model_build_times = []
-            gurobi_min_usage_times = []
-
-            for seed in range(10):
+        # Rows are streamed to a .partial file as they finish, so an interrupted sweep can pick up where it stopped
+        writer = CheckpointedCsvWriter(os.path.join(RESULTS_DIRECTORY, f'gurobi_vs_heuristic_N_{N}.csv'), HEADER,
+                                       ['Students', 'Sockets', 'Seed'], resume_interrupted_runs)
+        completed_rows = {(s, seed): row_from_csv(writer.completed_row(N, s, seed))
+                          for _, s, seed in (map(int, key) for key in writer.completed_rows)}
+        trace_writer = None
+        if record_solver_traces:
+            trace_writer = CheckpointedCsvWriter(os.path.join(RESULTS_DIRECTORY, f'gurobi_traces_N_{N}.csv'), TRACE_HEADER,
+                                                 ['Students', 'Sockets', 'Seed', 'Point'], resume_interrupted_runs)
+
+        def on_row(result):
+            # Traces go first so a row in the results file means its trace is complete
+            if trace_writer:
+                for trace_row in trace_rows(result.get('gurobi_trace'), N, result['s'], result['seed']):
+                    trace_writer.write_row(trace_row)
+            writer.write_row([result[key] for key in ROW_KEYS])
+
+        try:
+            if use_parallel_grid:
+                grid_manager = ExperimentGridManager(T, delta_T, timeout, max_workers=max_workers, cache_directory=result_cache_directory,
+                                                     skip_proven_optimal=skip_proven_optimal, record_trace=record_solver_traces)
+                results = grid_manager.run_socket_sweep(N, completed_rows, on_row)
+            else:
+                results = run_serial_sweep(N, T, delta_T, timeout, completed_rows, on_row)
+        except BaseException:
+            writer.close()
+            if trace_writer:
+                trace_writer.close()
+            raise
+
+        # Get the current time for the filename
+        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(RESULTS_DIRECTORY, f'gurobi_vs_heuristic_N_{N}_{current_time}.csv')
+
+        # Publish the results ordered by (s, seed)
+        print(f" Starting Data Export")
+        writer.finalize(filename, [[result[key] for key in ROW_KEYS] for result in results])
+        if trace_writer:
+            trace_writer.finalize(os.path.join(RESULTS_DIRECTORY, f'gurobi_traces_N_{N}_{current_time}.csv'),
+                                  sorted(trace_writer.completed_rows.values(), key=lambda row: tuple(map(int, row[:4]))))
+
+def row_from_csv(row):
+    def to_number(value):
+        return float(value) if value != '' else None
+    result = {key: to_number(row[column]) for key, column in zip(ROW_KEYS, HEADER)}
+    result['N'], result['s'], result['seed'] = int(result['N']), int(result['s']), int(result['seed'])
+    return result
+
+def run_serial_sweep(N, T, delta_T, timeout, completed_rows=None, on_row=None):
+    completed_rows = completed_rows or {}
+    num_time_slots = math.ceil(T / delta_T)
+    results = []
+    gurobi_sessions = {}
+    for s in range(1, N + 1):
+        print(f" Generating for sockets: {s}")
+        optimal = True
+
+        for seed in range(10):
+            if (s, seed) in completed_rows:
+                # Finished before the previous run was interrupted
+                result = completed_rows[(s, seed)]
+            else:
                 print(f" Generating for seed: {seed}")
                 manager = OptimizationInstanceManager(seed)
                 optimization_instance = manager.create_instance(N, s, T, delta_T,timeout)
@@ -43,60 +113,53 @@ def main():
                 heuristic_result = heuristic.optimize_allocation(optimization_instance)
                 heuristic_optimization_time = time.time() - start_time
 
-                if heuristic_result['min_usage_time'] < (num_time_slots):
-                    optimal = False
-
-                heuristic_u_scores.append(heuristic_result['A'])
-                heuristic_optimization_times.append(heuristic_optimization_time)
-                heuristic_min_usage_times.append(heuristic_result['min_usage_time'])
-
                 # Gurobi Optimization
                 print(f" Started Gurobi")
-                gurobi = GurobiOptimization()
                 start_time = time.time()
-                gurobi_result = gurobi.optimize_allocation(optimization_instance)
-                gurobi_optimization_time = time.time() - start_time
-                gurobi_model_build_time = gurobi_result.get('model_build_time', 0)
-
-                if gurobi_result['min_usage_time'] < (num_time_slots):
-                    optimal = False
-
-                gurobi_u_scores.append(gurobi_result['A'])
-                gurobi_optimization_times.append(gurobi_optimization_time)
-                gurobi_model_build_times.append(gurobi_model_build_time)
-                gurobi_min_usage_times.append(gurobi_result['min_usage_time'])
+                proven_optimal = skip_proven_optimal and meets_upper_bound(heuristic_result, optimization_instance)
+                if proven_optimal:
+                    print(f" Skipped Gurobi, the heuristic reached the upper bound")
+                    gurobi_result = heuristic_result
+                elif use_persistent_gurobi:
+                    if seed not in gurobi_sessions:
+                        gurobi_sessions[seed] = GurobiSocketSweepSession(optimization_instance, record_trace=record_solver_traces)
+                    gurobi_result = gurobi_sessions[seed].solve(s)
+                else:
+                    gurobi = GurobiOptimization(record_trace=record_solver_traces)
+                    gurobi_result = gurobi.optimize_allocation(optimization_instance)
+                # No Gurobi times for skipped solves, so they stay out of the execution time averages
+                gurobi_optimization_time = None if proven_optimal else time.time() - start_time
 
-            for seed in range(10):
-                results.append({
+                result = {
                     'N': N,
                     's': s,
-                    'heuristic_z': heuristic_min_usage_times[seed],
-                    'heuristic_u': heuristic_u_scores[seed],
-                    'heuristic_optimization_time': heuristic_optimization_times[seed],
-                    'gurobi_z': gurobi_min_usage_times[seed],
-                    'gurobi_u': gurobi_u_scores[seed],
-                    'gurobi_model_build_time': gurobi_model_build_times[seed],
-                    'gurobi_optimization_time': gurobi_optimization_times[seed]
-                })
-
-            if optimal:
-               print(f" Optimal was found for socket: {s}")
-               break
+                    'seed': seed,
+                    'heuristic_z': heuristic_result['min_usage_time'],
+                    'heuristic_u': heuristic_result['A'],
+                    'heuristic_optimization_time': heuristic_optimization_time,
+                    'gurobi_z': gurobi_result['min_usage_time'],
+                    'gurobi_u': gurobi_result['A'],
+                    'gurobi_model_build_time': None if proven_optimal else gurobi_result.get('model_build_time', 0),
+                    'gurobi_optimization_time': gurobi_optimization_time,
+                    'gurobi_trace': None if proven_optimal else gurobi_result.get('solver_trace')
+                }
+                if on_row:
+                    on_row(result)
 
-        # Get the current time for the filename
-        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f'Gurobi vs Heuristic Comparison Results\\gurobi_vs_heuristic_N_{N}_{current_time}.csv'
+            if result['heuristic_z'] is None or result['heuristic_z'] < (num_time_slots):
+                optimal = False
+            if result['gurobi_z'] is None or result['gurobi_z'] < (num_time_slots):
+                optimal = False
+            results.append(result)
 
-        # Write results to CSV file
-        print(f" Starting Data Export")
-        with open(filename, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['Students', 'Sockets', 'Heuristic_Z', 'Heuristic_U', 'Heuristic_Optimization_Time',
-                             'Gurobi_Z', 'Gurobi_U', 'Gurobi_model_build_time', 'Gurobi_optimization_time'])
-            for result in results:
-                writer.writerow([result['N'], result['s'], result['heuristic_z'], result['heuristic_u'],
-                                 result['heuristic_optimization_time'], result['gurobi_z'], result['gurobi_u'],
-                                 result['gurobi_model_build_time'], result['gurobi_optimization_time']])
+        if optimal:
+           print(f" Optimal was found for socket: {s}")
+           break
+
+    for gurobi_session in gurobi_sessions.values():
+        gurobi_session.close()
+
+    return results
 
 if __name__ == "__main__":
     main()
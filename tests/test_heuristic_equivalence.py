@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+from Entities.optimization_instance import OptimizationInstance
+from Entities.schedule import Schedule
+from Managers.instance_generator import InstanceGenerator
+from Algorithms.heuristic_algorithm import HeuristicOptimization
+from Algorithms.heuristic_vectorized import VectorizedHeuristicOptimization
+from Algorithms.online_heuristic import OnlineHeuristicOptimization
+
+def tied_instance(seed, N, s, T, delta_T):
+    """Students drawn from a handful of identical profiles, so most ranking keys tie."""
+    rng = np.random.default_rng(seed)
+    recharge_rates = rng.choice([20.0, 30.0], N)
+    discharge_rates = rng.choice([10.0, 15.0], N)
+    initial_batteries = rng.choice([5.0, 50.0, 100.0], N)
+    return OptimizationInstance.from_arrays(recharge_rates, discharge_rates, initial_batteries, s, T, delta_T, 0)
+
+class HeuristicEquivalenceTest(unittest.TestCase):
+    # (N, s, T, delta_T), with slot counts that are and are not multiples of 8
+    SHAPES = [(5, 1, 4, 0.5), (12, 3, 5.5, 0.5), (30, 4, 8, 0.25), (64, 16, 6, 0.5)]
+    SEEDS = range(3)
+
+    def instances(self):
+        instance_generator = InstanceGenerator()
+        for N, s, T, delta_T in self.SHAPES:
+            for seed in self.SEEDS:
+                yield f"generated N={N} s={s} seed={seed}", instance_generator.create_instance(seed, N, s, T, delta_T)
+                yield f"tied N={N} s={s} seed={seed}", tied_instance(seed, N, s, T, delta_T)
+
+    def assertSameResult(self, result, expected):
+        np.testing.assert_array_equal(result.U, expected.U)
+        np.testing.assert_array_equal(result.Y, expected.Y)
+        np.testing.assert_allclose(result.B[:, :expected.B.shape[1]], expected.B)
+        self.assertEqual(result.min_usage_time, expected.min_usage_time)
+        self.assertAlmostEqual(result.A, expected.A)
+
+    def test_vectorized_matches_reference(self):
+        for label, optimization_instance in self.instances():
+            with self.subTest(label):
+                self.assertSameResult(VectorizedHeuristicOptimization().optimize_allocation(optimization_instance),
+                                      HeuristicOptimization().optimize_allocation(optimization_instance))
+
+    def test_batched_matches_reference(self):
+        for label, optimization_instance in self.instances():
+            with self.subTest(label):
+                # Same students under every socket count from 1 to N, solved as one batch
+                socket_counts = range(1, optimization_instance.num_students + 1)
+                batch = [OptimizationInstance(optimization_instance.students, s, optimization_instance.total_time,
+                                              optimization_instance.delta_t, 0) for s in socket_counts]
+                results = VectorizedHeuristicOptimization().optimize_allocations(batch)
+                for instance, result in zip(batch, results):
+                    self.assertSameResult(result, HeuristicOptimization().optimize_allocation(instance))
+
+    def test_online_matches_reference(self):
+        for label, optimization_instance in self.instances():
+            with self.subTest(label):
+                self.assertSameResult(OnlineHeuristicOptimization().optimize_allocation(optimization_instance),
+                                      HeuristicOptimization().optimize_allocation(optimization_instance))
+
+    def test_packed_schedule_matches_dense_arrays(self):
+        for label, optimization_instance in self.instances():
+            with self.subTest(label):
+                result = HeuristicOptimization().optimize_allocation(optimization_instance)
+                U, Y = result.U, result.Y
+                schedule = Schedule.from_arrays(U, Y)
+                np.testing.assert_array_equal(schedule.U, U)
+                np.testing.assert_array_equal(schedule.Y, Y)
+                np.testing.assert_array_equal(result.schedule.usage(), U.sum(axis=1))
+                np.testing.assert_array_equal(result.schedule.charging_slots(), Y.sum(axis=1))
+                np.testing.assert_array_equal(result.schedule.socket_counts(), Y.sum(axis=0))
+                self.assertEqual(result.min_usage_time, U.sum(axis=1).min())
+                for t in range(schedule.num_time_slots):
+                    U_column, Y_column = schedule.slot(t)
+                    np.testing.assert_array_equal(U_column, U[:, t] == 1)
+                    np.testing.assert_array_equal(Y_column, Y[:, t] == 1)
+
+if __name__ == '__main__':
+    unittest.main()
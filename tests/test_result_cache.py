@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from Managers.instance_generator import InstanceGenerator
+from Managers.result_cache import ResultCache
+from Algorithms.heuristic_algorithm import HeuristicOptimization
+from Algorithms.instrumentation import PhaseProfiler
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.result_cache = ResultCache(self.directory.name)
+        self.optimization_instance = InstanceGenerator().create_instance(0, 8, 2, 4, 0.5, 5)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key_is_stable_across_a_run(self):
+        algorithm = HeuristicOptimization(PhaseProfiler())
+        key = self.result_cache.key(algorithm, self.optimization_instance)
+        algorithm.optimize_allocation(self.optimization_instance)
+        self.assertEqual(self.result_cache.key(algorithm, self.optimization_instance), key)
+
+    def test_key_depends_on_nested_settings(self):
+        key = self.result_cache.key(HeuristicOptimization(PhaseProfiler()), self.optimization_instance)
+        self.assertEqual(self.result_cache.key(HeuristicOptimization(PhaseProfiler()), self.optimization_instance), key)
+        self.assertNotEqual(self.result_cache.key(HeuristicOptimization(PhaseProfiler(trace_memory=True)), self.optimization_instance), key)
+        self.assertNotEqual(self.result_cache.key(HeuristicOptimization(), self.optimization_instance), key)
+
+    def test_round_trip(self):
+        algorithm = HeuristicOptimization()
+        result = algorithm.optimize_allocation(self.optimization_instance)
+        result['num_moves'] = 3
+        key = self.result_cache.key(algorithm, self.optimization_instance)
+        self.assertIsNone(self.result_cache.get(key))
+        self.result_cache.put(key, result)
+
+        cached = self.result_cache.get(key)
+        np.testing.assert_array_equal(cached['U'], result['U'])
+        np.testing.assert_array_equal(cached['Y'], result['Y'])
+        np.testing.assert_array_equal(cached['B'], result['B'])
+        for name in ('status', 'fair_maximized_usage_score', 'min_usage_time', 'A', 'num_moves'):
+            self.assertEqual(cached[name], result[name])
+
+    def test_reads_unpacked_entries(self):
+        # Entries written before U and Y were bit-packed hold them as full arrays
+        result = HeuristicOptimization().optimize_allocation(self.optimization_instance)
+        metadata = {'status': 'optimal', 'fair_maximized_usage_score': float(result.fair_maximized_usage_score),
+                    'min_usage_time': float(result.min_usage_time), 'A': float(result.A), 'model_build_time': 0,
+                    'optimization_time': 0, 'extras': {}}
+        np.savez_compressed(self.result_cache.path('legacy'), metadata=np.array(json.dumps(metadata)),
+                            U=result.U, Y=result.Y, B=result.B)
+
+        cached = self.result_cache.get('legacy')
+        np.testing.assert_array_equal(cached['U'], result['U'])
+        np.testing.assert_array_equal(cached['Y'], result['Y'])
+        self.assertEqual(cached['min_usage_time'], result['min_usage_time'])
+
+    def test_skips_results_that_stopped_early(self):
+        for reason in ('time_limit', 'interrupted'):
+            result = HeuristicOptimization().optimize_allocation(self.optimization_instance)
+            result['stopped_early'] = reason
+            self.result_cache.put(reason, result)
+            self.assertIsNone(self.result_cache.get(reason))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_evicts_least_recently_used(self):
+        result = HeuristicOptimization().optimize_allocation(self.optimization_instance)
+        self.result_cache.put('first', result)
+        entry_bytes = os.path.getsize(self.result_cache.path('first'))
+        self.result_cache.max_bytes = 2 * entry_bytes + entry_bytes // 2
+        self.result_cache.put('second', result)
+        os.utime(self.result_cache.path('first'), (1, 1))
+        os.utime(self.result_cache.path('second'), (2, 2))
+        self.result_cache.get('first')  # Now the most recently used
+        self.result_cache.put('third', result)
+
+        self.assertIsNotNone(self.result_cache.get('first'))
+        self.assertIsNone(self.result_cache.get('second'))
+        self.assertIsNotNone(self.result_cache.get('third'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import math
+import unittest
+import gurobipy as gp
+from gurobipy import GRB
+from Algorithms.solver_telemetry import SolverTraceRecorder
+
+class SolverTraceRecorderTest(unittest.TestCase):
+    def test_first_incumbent_is_first_solution(self):
+        # A small knapsack whose heuristics and search find several incumbents
+        model = gp.Model()
+        model.Params.OutputFlag = 0
+        model.Params.Presolve = 0
+        model.Params.Heuristics = 0
+        weights = [23, 31, 29, 44, 53, 38, 63, 85, 89, 82, 17, 41, 57, 71, 13]
+        values = [92, 57, 49, 68, 60, 43, 67, 84, 87, 72, 31, 45, 61, 70, 19]
+        x = model.addVars(len(weights), vtype=GRB.BINARY)
+        model.addConstr(gp.quicksum(w * x[i] for i, w in enumerate(weights)) <= 265)
+        model.setObjective(gp.quicksum(v * x[i] for i, v in enumerate(values)), GRB.MAXIMIZE)
+
+        recorder = SolverTraceRecorder()
+        recorder.next_sample_time = math.inf  # Only record the new incumbents
+        solutions = []
+
+        def callback(model, where):
+            if where == GRB.Callback.MIPSOL:
+                solutions.append(model.cbGet(GRB.Callback.MIPSOL_OBJ))
+            recorder(model, where)
+
+        model.optimize(callback)
+        incumbents = [point[1] for point in recorder.points]
+
+        self.assertEqual(len(incumbents), len(solutions))
+        self.assertEqual(incumbents[0], solutions[0])
+        self.assertEqual(max(incumbents), model.ObjVal)
+
+if __name__ == '__main__':
+    unittest.main()